@@ -0,0 +1,24 @@
+""" Global version numbers kept in the shared cache (settings.CACHES).
+
+Bumping a version invalidates everything keyed by it in all app instances.
+"""
+import time
+from django.core.cache import cache
+
+
+def get_version(key):
+    """ Current version stored under key. """
+    version = cache.get(key)
+    if version is None:
+        # time based start value, so an evicted key never repeats an old version
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(key):
+    """ Move key to a new version. """
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
@@ -0,0 +1,140 @@
+""" Read replicas with read-your-writes consistency.
+
+Reads made while handling a request go to a replica (settings.DATABASE_REPLICAS)
+unless the request is pinned to the primary:
+    - it is not a safe method (POST, PUT, PATCH, DELETE)
+    - it already wrote to the primary, or runs inside a transaction
+    - its client wrote within the last REPLICA_PIN_SECONDS, marked by a cookie
+      the middleware sets after every successful unsafe or writing request
+      (raw SQL writes do not pass the router, so the method counts too)
+Related objects are read from the database their instance came from, so a
+queryset sent to the primary with .using('default') stays there; reads that
+refill a version-keyed cache must do that, a lagging replica would otherwise
+freeze stale data under the new version.
+Outside requests (management commands, shell) everything uses the primary.
+A replica that cannot be connected to is skipped for REPLICA_RETRY_SECONDS.
+A safe request that failed on a replica connection (e.g. one that died while
+open) is marked down the same way and the request runs again on the primary.
+"""
+import logging
+import random
+import time
+from contextvars import ContextVar
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, transaction
+
+logger = logging.getLogger(__name__)
+
+PIN_COOKIE = 'pin_primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# request-scoped state, None outside requests
+_request_state = ContextVar('replica_request_state', default=None)
+# alias -> monotonic time until which the replica is considered down
+_down_until = {}
+
+
+class RequestState:
+    def __init__(self, pinned):
+        self.pinned = pinned
+        self.wrote = False
+        self.replicas = set()
+
+
+def get_replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+def _mark_down(alias):
+    logger.warning('Replica %s is unavailable, reading from the primary.', alias)
+    _down_until[alias] = time.monotonic() + getattr(settings, 'REPLICA_RETRY_SECONDS', 30)
+    connections[alias].close()
+
+
+def _replica_available(alias):
+    if _down_until.get(alias, 0) > time.monotonic():
+        return False
+    try:
+        connections[alias].ensure_connection()
+    except OperationalError:
+        _mark_down(alias)
+        return False
+    return True
+
+
+def _failed_replicas(state):
+    # errors_occurred is set by Django on a connection whose query raised a
+    # database error, it is reset when the connection is checked between requests
+    return [alias for alias in state.replicas if connections[alias].errors_occurred]
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        state = _request_state.get()
+        if state is None or state.pinned or state.wrote:
+            return DEFAULT_DB_ALIAS
+        if transaction.get_connection(DEFAULT_DB_ALIAS).in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        replicas = get_replicas()
+        for alias in random.sample(replicas, len(replicas)):
+            if _replica_available(alias):
+                state.replicas.add(alias)
+                return alias
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *get_replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # replicas receive the schema through replication
+        if db in get_replicas():
+            return False
+        return None
+
+
+class ReadYourWritesMiddleware:
+    """ Scope the router state to the request and keep writers on the primary for a while. """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        safe = request.method in SAFE_METHODS
+        state = RequestState(pinned=not safe or PIN_COOKIE in request.COOKIES)
+        response = self.handle(request, state)
+        if response.status_code >= 500 and safe:
+            failed = _failed_replicas(state)
+            if failed:
+                for alias in failed:
+                    _mark_down(alias)
+                # safe methods are idempotent, run the request again on the primary
+                state = RequestState(pinned=True)
+                response = self.handle(request, state)
+        if state.wrote or (not safe and response.status_code < 400):
+            response.set_cookie(
+                PIN_COOKIE,
+                '1',
+                max_age=getattr(settings, 'REPLICA_PIN_SECONDS', 10),
+                httponly=True,
+                samesite='Lax',
+                secure=request.is_secure(),
+            )
+        return response
+
+    def handle(self, request, state):
+        token = _request_state.set(state)
+        try:
+            return self.get_response(request)
+        finally:
+            _request_state.reset(token)
@@ -1,5 +1,86 @@
+import json
+from base64 import b64decode, b64encode
+from binascii import Error as BinasciiError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import CursorPagination
 
 class CustomCursorPagination(CursorPagination):
     page_size = 3
     ordering = 'created_at'
+
+
+class IdCursorPagination(CursorPagination):
+    """ Keyset pagination on the primary key only, newest first: WHERE id < last ORDER BY id DESC. """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = '-id'
+
+
+class EventCursorPagination(IdCursorPagination):
+    """ Upcoming events first, id breaks ties of equal timestamps. """
+    ordering = ('timestamp', 'id')
+
+
+def encode_keyset_cursor(*values):
+    """ Opaque token for the last (ordering..., id) values of a page. """
+    raw = json.dumps([value.isoformat() if hasattr(value, 'isoformat') else value for value in values])
+    return b64encode(raw.encode('ascii')).decode('ascii')
+
+
+def decode_keyset_cursor(token, size):
+    """ Values encoded by encode_keyset_cursor, NotFound for a broken token. """
+    try:
+        values = json.loads(b64decode(token.encode('ascii')).decode('ascii'))
+    except (BinasciiError, UnicodeError, ValueError):
+        raise NotFound('Invalid cursor')
+    if not isinstance(values, list) or len(values) != size:
+        raise NotFound('Invalid cursor')
+    return values
+
+
+def decode_datetime_cursor(token):
+    """ (datetime, id) of a token encoded from a (created_at, id) pair, NotFound for a broken token. """
+    moment, pk = decode_keyset_cursor(token, 2)
+    try:
+        moment = parse_datetime(moment) if isinstance(moment, str) else None
+    except ValueError:
+        # well formatted but impossible, e.g. month 13
+        moment = None
+    if moment is None or not isinstance(pk, int) or isinstance(pk, bool):
+        raise NotFound('Invalid cursor')
+    return moment, pk
+
+
+class EstimatedCountPaginator(Paginator):
+    """ Admin paginator using the planner row estimate for big unfiltered tables.
+
+    Unfiltered changelists of tables with more than `threshold` rows take the
+    count from pg_class.reltuples instead of running COUNT(*).
+    """
+    threshold = 100_000
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is not None and not query.where:
+            estimate = self.estimated_count()
+            if estimate > self.threshold:
+                return estimate
+        return super().count
+
+    def estimated_count(self):
+        connection = connections[self.object_list.db]
+        if connection.vendor != 'postgresql':
+            return 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                [self.object_list.model._meta.db_table]
+            )
+            row = cursor.fetchone()
+        return row[0] if row else 0
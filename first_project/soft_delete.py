@@ -0,0 +1,83 @@
+""" Reusable soft delete: abstract model, manager and queryset.
+
+Usage:
+    class Author(SoftDeleteModel):
+        objects = SoftDeleteManager()       # hides soft-deleted rows
+        all_objects = models.Manager()
+
+Bulk operations on a queryset are single UPDATE statements and send
+post_soft_delete / post_restore instead of per-instance post_save.
+"""
+from django.db import models
+from django.dispatch import Signal
+from django.utils import timezone
+
+# sender=model class, kwargs: queryset, count
+post_soft_delete = Signal()
+post_restore = Signal()
+
+
+class SoftDeleteQuerySet(models.QuerySet):
+    def delete(self):
+        """ Soft delete all rows with one UPDATE. """
+        count = self.filter(is_deleted=False).update(is_deleted=True, deleted_at=timezone.now())
+        post_soft_delete.send(sender=self.model, queryset=self, count=count, using=self.db)
+        return count, {self.model._meta.label: count}
+
+    delete.alters_data = True
+
+    def restore(self):
+        """ Restore all soft-deleted rows with one UPDATE. """
+        count = self.filter(is_deleted=True).update(is_deleted=False, deleted_at=None)
+        post_restore.send(sender=self.model, queryset=self, count=count, using=self.db)
+        return count
+
+    restore.alters_data = True
+
+    def hard_delete(self):
+        """ Permanently delete rows. """
+        return super().delete()
+
+    hard_delete.alters_data = True
+
+
+class SoftDeleteManager(models.Manager.from_queryset(SoftDeleteQuerySet)):
+    """ Exclude soft-deleted objects by default. """
+    def get_queryset(self):
+        return super().get_queryset().filter(is_deleted=False)
+
+    def include_deleted(self):
+        """ Include soft-deleted objects. """
+        return super().get_queryset()
+
+    def only_deleted(self):
+        """ Only soft-deleted objects. """
+        return super().get_queryset().filter(is_deleted=True)
+
+
+class SoftDeleteModel(models.Model):
+    """ Abstract model with soft delete, restore and hard delete. """
+    is_deleted = models.BooleanField(verbose_name="Is Deleted", default=False)
+    deleted_at = models.DateTimeField(verbose_name="Deleted At", null=True, default=None)
+
+    objects = SoftDeleteManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        abstract = True
+
+    def delete(self):
+        """ Soft delete. """
+        self.is_deleted = True
+        self.deleted_at = timezone.now()
+        self.save()
+
+    def restore(self):
+        """ Restore a soft-deleted. """
+        self.is_deleted = False
+        self.deleted_at = None
+        self.save()
+
+    def hard_delete(self):
+        """ Hard delete. """
+        super().delete()
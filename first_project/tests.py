@@ -0,0 +1,105 @@
+from unittest import skipUnless
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connection, connections, router
+from django.http import HttpResponse
+from django.test import RequestFactory, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from task_manager import catalog
+from task_manager.models import Category
+from . import db_router
+
+REPLICA = 'replica_0'
+
+
+@skipUnless(
+    REPLICA in settings.DATABASES,
+    'needs a replica, run with REPLICA_URLS set (in tests it mirrors the default database)'
+)
+class ReplicaRouterTest(TransactionTestCase):
+    """ Routing decisions of ReplicaRouter and ReadYourWritesMiddleware.
+
+    TransactionTestCase: inside a TestCase transaction every read is pinned to
+    the primary.
+    """
+    databases = {DEFAULT_DB_ALIAS, REPLICA}
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        db_router._down_until.clear()
+        catalog._snapshot = None
+        self.category = Category.objects.create(name='Replica')
+
+    def call(self, request, view):
+        return db_router.ReadYourWritesMiddleware(view)(request)
+
+    def read_alias(self, request):
+        seen = []
+
+        def view(request):
+            seen.append(router.db_for_read(Category))
+            return HttpResponse()
+
+        response = self.call(request, view)
+        return seen[0], response
+
+    def test_safe_request_reads_from_replica(self):
+        alias, response = self.read_alias(self.factory.get('/'))
+        self.assertEqual(alias, REPLICA)
+        self.assertNotIn(db_router.PIN_COOKIE, response.cookies)
+
+    def test_pinned_client_reads_from_primary(self):
+        request = self.factory.get('/')
+        request.COOKIES[db_router.PIN_COOKIE] = '1'
+        self.assertEqual(self.read_alias(request)[0], DEFAULT_DB_ALIAS)
+
+    def test_unsafe_request_pins_client_without_orm_write(self):
+        # raw SQL writes (services.bulk_transition) never reach db_for_write
+        alias, response = self.read_alias(self.factory.post('/'))
+        self.assertEqual(alias, DEFAULT_DB_ALIAS)
+        self.assertIn(db_router.PIN_COOKIE, response.cookies)
+
+    def test_failed_unsafe_request_does_not_pin(self):
+        response = self.call(self.factory.post('/'), lambda request: HttpResponse(status=400))
+        self.assertNotIn(db_router.PIN_COOKIE, response.cookies)
+
+    def test_related_reads_follow_instance(self):
+        category = Category.objects.using(DEFAULT_DB_ALIAS).get(pk=self.category.pk)
+        seen = []
+
+        def view(request):
+            seen.append(router.db_for_read(Category, instance=category))
+            return HttpResponse()
+
+        self.call(self.factory.get('/'), view)
+        self.assertEqual(seen, [DEFAULT_DB_ALIAS])
+
+    def test_category_catalog_is_loaded_from_primary(self):
+        def view(request):
+            return HttpResponse(len(catalog.get_category_catalog().by_id))
+
+        with CaptureQueriesContext(connections[REPLICA]) as replica_queries:
+            response = self.call(self.factory.get('/'), view)
+        self.assertEqual(response.content, b'1')
+        self.assertEqual(len(replica_queries), 0)
+
+    def test_dead_replica_connection_falls_back_to_primary(self):
+        def view(request):
+            return HttpResponse(Category.objects.get(pk=self.category.pk).name)
+
+        self.assertEqual(self.call(self.factory.get('/'), view).content, b'Replica')
+        replica = connections[REPLICA]
+        self.assertIsNotNone(replica.connection)
+        # the open replica connection dies between requests
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_terminate_backend(%s)', [replica.connection.info.backend_pid])
+
+        def failing_view(request):
+            try:
+                return view(request)
+            except Exception:
+                return HttpResponse(status=500)
+
+        response = self.call(self.factory.get('/'), failing_view)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b'Replica')
+        self.assertEqual(self.read_alias(self.factory.get('/'))[0], DEFAULT_DB_ALIAS)
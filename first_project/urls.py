@@ -25,5 +25,6 @@ urlpatterns = [
     path('', RedirectView.as_view(url='/admin/', permanent=True)),
     path('', include('myapp.urls')),
     path('manager/', include('task_manager.urls')),
+    path('library/', include('library.urls')),
     #path("hello", view=hello, name="hello"),
 ]
\ No newline at end of file
@@ -1,4 +1,7 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.db.models import F
+from first_project.admin_export import CsvExportMixin
+from library.services import cancel, delete_borrow, return_borrow
 from library.models import (
     Author,
     Book,
@@ -8,6 +11,8 @@ from library.models import (
     Member,
     Post,
     Borrow,
+    Inventory,
+    OverdueSnapshot,
     Review,
     AuthorDetail,
     Event,
@@ -32,16 +37,174 @@ from library.models import (
 # class EventAdmin(admin.ModelAdmin):
 #     list_display = ('title', 'description', 'timestamp', 'library')  # отображаемые поля
 
+class CsvExportAdmin(CsvExportMixin, admin.ModelAdmin):
+    """ Default admin of library models with CSV export. """
+
+
+@admin.register(Borrow)
+class BorrowAdmin(CsvExportAdmin):
+    """ Loans are created by the checkout API, returns and deletes go through the services.
+
+    That keeps Inventory.available in step, so adding loans and changing their
+    book, library or state is not possible here.
+    """
+    list_display = ('member', 'book', 'library', 'book_take_date', 'book_return_date', 'is_returned',)
+    list_select_related = ('member', 'book', 'library',)
+    list_filter = ('is_returned', 'book_return_date',)
+    actions = ['mark_returned']
+    csv_fields = (
+        'id', 'member__first_name', 'member__last_name', 'member__email', 'book__title',
+        'library__title', 'book_take_date', 'book_return_date', 'is_returned', 'returned_at',
+    )
+
+    readonly_fields = ('member', 'book', 'library', 'book_take_date', 'is_returned', 'returned_at',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def delete_model(self, request, obj):
+        delete_borrow(obj)
+
+    def delete_queryset(self, request, queryset):
+        for borrow in queryset:
+            delete_borrow(borrow)
+
+    def mark_returned(self, request, queryset):
+        returned = sum(return_borrow(borrow) for borrow in queryset.filter(is_returned=False))
+        self.message_user(request, f"{returned} loans returned.")
+    mark_returned.short_description = "Return selected loans"
+
+
+@admin.register(Inventory)
+class InventoryAdmin(CsvExportAdmin):
+    list_display = ('book', 'library', 'copies', 'available',)
+    list_select_related = ('book', 'library',)
+    list_filter = ('library',)
+    search_fields = ('book__title',)
+    csv_fields = ('book__title', 'library__title', 'copies', 'available',)
+
+    def get_readonly_fields(self, request, obj=None):
+        if obj is not None:
+            return ('available',)
+        return ()
+
+    def save_model(self, request, obj, form, change):
+        if change and 'copies' in form.changed_data:
+            # relative update, checkouts may have changed available meanwhile
+            delta = obj.copies - form.initial['copies']
+            updated = Inventory.objects.filter(pk=obj.pk, available__gte=max(-delta, 0)).update(
+                copies=F('copies') + delta,
+                available=F('available') + delta
+            )
+            if not updated:
+                self.message_user(request, "Not enough copies on the shelf to remove.", messages.ERROR)
+            obj.refresh_from_db()
+            return
+        super().save_model(request, obj, form, change)
+
+
+@admin.register(OverdueSnapshot)
+class OverdueSnapshotAdmin(CsvExportAdmin):
+    list_display = ('date', 'library', 'member', 'overdue_count', 'oldest_return_date',)
+    list_select_related = ('library', 'member',)
+    list_filter = ('date', 'library',)
+    date_hierarchy = 'date'
+    csv_fields = (
+        'date', 'library__title', 'member__first_name', 'member__last_name', 'member__email',
+        'overdue_count', 'oldest_return_date',
+    )
+
+
+@admin.register(Event)
+class EventAdmin(CsvExportAdmin):
+    """ Event.clean() keeps the capacity above the participants registered through the API. """
+    list_display = ('name', 'timestamp', 'library', 'capacity', 'participant_count',)
+    list_select_related = ('library',)
+    list_filter = ('library',)
+
+    def save_model(self, request, obj, form, change):
+        if not change:
+            obj.save()
+            return
+        # participant_count of the form instance may be stale, library.services maintain it
+        obj.save(update_fields=[
+            field.name for field in obj._meta.concrete_fields
+            if not field.primary_key and field.name != 'participant_count'
+        ])
+
+
+@admin.register(EventParticipant)
+class EventParticipantAdmin(CsvExportAdmin):
+    """ Registrations are made through the API, which keeps Event.participant_count. """
+    list_display = ('event', 'member', 'register_date',)
+    list_select_related = ('event', 'member',)
+    list_filter = ('event',)
+    csv_fields = ('event__name', 'member__first_name', 'member__last_name', 'member__email', 'register_date',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def delete_model(self, request, obj):
+        cancel(obj.event, obj.member)
+
+    def delete_queryset(self, request, queryset):
+        for participant in queryset.select_related('event', 'member'):
+            cancel(participant.event, participant.member)
+
+
+@admin.register(Author)
+class AuthorAdmin(CsvExportAdmin):
+    """ Authors are soft deleted (SoftDeleteModel): books keep pointing to them.
+
+    Deleted authors stay listed so they can be restored, the admin delete
+    (which would list cascading deletes that do not happen) is replaced by
+    the mark deleted / restore actions.
+    """
+    list_display = ('first_name', 'last_name', 'is_deleted', 'deleted_at',)
+    list_filter = ('is_deleted',)
+    search_fields = ('last_name',)
+    readonly_fields = ('is_deleted', 'deleted_at',)
+    actions = ['mark_deleted', 'restore']
+
+    def get_queryset(self, request):
+        # SoftDeleteQuerySet, so a bulk delete() stays a soft delete
+        return Author.objects.include_deleted()
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    @admin.action(description="Mark selected authors deleted", permissions=["change"])
+    def mark_deleted(self, request, queryset):
+        deleted, _ = queryset.delete()
+        self.message_user(request, f"{deleted} authors marked deleted.")
+
+    @admin.action(description="Restore selected authors", permissions=["change"])
+    def restore(self, request, queryset):
+        self.message_user(request, f"{queryset.restore()} authors restored.")
+
+
+@admin.register(Book)
+class BookAdmin(CsvExportAdmin):
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        # books may keep a soft-deleted author, which the default manager hides
+        if db_field.name == 'author':
+            kwargs['queryset'] = Author.all_objects.all()
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+
 # Register your models here.
-admin.site.register(Author)
-admin.site.register(Book)
-#admin.site.register(Publisher)
-admin.site.register(Category)
-admin.site.register(Library)
-admin.site.register(Member)
-admin.site.register(Post)
-admin.site.register(Borrow)
-admin.site.register(Review)
-admin.site.register(AuthorDetail)
-admin.site.register(Event)
-admin.site.register(EventParticipant)
\ No newline at end of file
+admin.site.register(
+    [
+        #Publisher,
+        Category,
+        Library,
+        Member,
+        Post,
+        Review,
+        AuthorDetail,
+    ],
+    CsvExportAdmin
+)
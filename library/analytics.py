@@ -0,0 +1,284 @@
+""" Circulation reports over loans taken in a period [date_from, date_to].
+
+Every report has two interchangeable implementations:
+    sql       GROUP BY in the database, only the aggregated rows are fetched
+    columnar  narrow columns fetched once into NumPy arrays (dates as int64
+              days, library and genre as categorical codes) and aggregated
+              with vectorized grouping (bincount, unique, lexsort)
+Both return the same structure. settings.LIBRARY_ANALYTICS_BACKENDS picks the
+implementation per report (sql by default); manage.py benchmark_analytics
+times both on real data. Results are cached per period: briefly while the
+period is still open, for a day once it is closed.
+"""
+from datetime import date
+from itertools import islice
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import (
+    Aggregate, Avg, BigIntegerField, Case, Count, DateField, F, FloatField, Func, IntegerField, Q, Value, When,
+)
+from django.db.models.functions import Coalesce, TruncMonth
+from django.utils import timezone
+from .models import Book, Borrow, Library
+
+OPEN_PERIOD_TIMEOUT = 5 * 60
+CLOSED_PERIOD_TIMEOUT = 24 * 60 * 60
+NO_DATE = np.iinfo(np.int64).min
+EPOCH = date(1970, 1, 1)
+PERCENTILES = (0.5, 0.9)
+
+
+class PercentileCont(Aggregate):
+    """ PostgreSQL PERCENTILE_CONT(fraction) WITHIN GROUP (ORDER BY expression). """
+    function = 'PERCENTILE_CONT'
+    template = '%(function)s(%(fraction)s) WITHIN GROUP (ORDER BY %(expressions)s)'
+    output_field = FloatField()
+
+    def __init__(self, expression, fraction, **extra):
+        super().__init__(expression, fraction=float(fraction), **extra)
+
+
+class DateDiff(Func):
+    """ Days between two date columns (PostgreSQL date - date is an integer). """
+    arg_joiner = ' - '
+    template = '(%(expressions)s)'
+    output_field = IntegerField()
+
+
+class Columns:
+    """ Loans of a period as parallel NumPy int64 arrays, one element per Borrow.
+
+    Dates are days since 1970-01-01 (NO_DATE when missing), library and genre
+    are categorical codes into self.libraries / self.genres. On PostgreSQL the
+    day numbers are computed by the query. Rows are streamed in chunk_size
+    chunks, see fetch_columns.
+    """
+    def __init__(self, queryset, chunk_size=10_000):
+        queryset = queryset.order_by()
+        # codes for every genre in the (small) book table, not only those of the period
+        self.genres = list(Book.objects.using(queryset.db).order_by().values_list('Genre', flat=True).distinct())
+        queryset = queryset.annotate(genre_code=Case(
+            *[When(book__Genre=genre, then=Value(code)) for code, genre in enumerate(self.genres)],
+            default=Value(-1),
+            output_field=IntegerField(),
+        ))
+        if connections[queryset.db].vendor == 'postgresql':
+            # the database computes the integer columns
+            library, self.genre, self.taken, self.due, self.returned, is_returned = fetch_columns(
+                queryset.annotate(
+                    taken_day=_day('book_take_date'),
+                    due_day=_day('book_return_date'),
+                    returned_day=_day('returned_at'),
+                ),
+                ('library_id', 'genre_code', 'taken_day', 'due_day', 'returned_day', 'is_returned'),
+                chunk_size=chunk_size,
+            )
+        else:
+            library, self.genre, self.taken, self.due, self.returned, is_returned = fetch_columns(
+                queryset,
+                ('library_id', 'genre_code', 'book_take_date', 'book_return_date', 'returned_at', 'is_returned'),
+                chunk_size=chunk_size,
+                convert={'book_take_date': _days, 'book_return_date': _days, 'returned_at': _days},
+            )
+        self.libraries, self.library = np.unique(library, return_inverse=True)
+        self.is_returned = is_returned.astype(bool)
+
+    def __len__(self):
+        return len(self.library)
+
+
+def _day(field):
+    # PostgreSQL: date - date is an integer
+    return Coalesce(
+        DateDiff(field, Value(EPOCH, output_field=DateField())), Value(NO_DATE), output_field=BigIntegerField()
+    )
+
+
+def fetch_columns(queryset, fields, chunk_size=10_000, convert=None):
+    """ One int64 array per field of queryset.values_list(*fields).
+
+    Rows are streamed chunk_size at a time (a server-side cursor on
+    PostgreSQL) into arrays preallocated from COUNT(*), so no Python row
+    outlives its chunk. convert maps a field to a function turning a chunk of
+    its values into int64, the values are plain integers (or booleans) otherwise.
+    """
+    convert = convert or {}
+    total = queryset.count()
+    columns = np.empty((len(fields), total), dtype=np.int64)
+    size = 0
+    rows = queryset.values_list(*fields).iterator(chunk_size=chunk_size)
+    while chunk := list(islice(rows, chunk_size)):
+        end = size + len(chunk)
+        if end > columns.shape[1]:
+            # rows added after the count
+            columns = np.concatenate([columns, np.empty((len(fields), end - columns.shape[1]), np.int64)], axis=1)
+        for index, (field, values) in enumerate(zip(fields, zip(*chunk))):
+            columns[index, size:end] = convert[field](values) if field in convert else values
+        size = end
+    return columns[:, :size]
+
+
+def _days(dates):
+    days = np.array(dates, dtype='datetime64[D]')
+    return np.where(np.isnat(days), NO_DATE, days.astype(np.int64))
+
+
+def group_percentiles(groups, values, fractions):
+    """ PERCENTILE_CONT of values per group code: (codes present, {fraction: array}).
+
+    One lexsort, then linear interpolation between the closest ranks of all
+    groups at once.
+    """
+    order = np.lexsort((values, groups))
+    groups, values = groups[order], values[order].astype(np.float64)
+    codes, starts, counts = np.unique(groups, return_index=True, return_counts=True)
+    result = {}
+    for fraction in fractions:
+        position = fraction * (counts - 1)
+        lower = np.floor(position).astype(np.int64)
+        upper = np.minimum(lower + 1, counts - 1)
+        low, high = values[starts + lower], values[starts + upper]
+        result[fraction] = low + (high - low) * (position - lower)
+    return codes, result
+
+
+def _loans(date_from, date_to):
+    return Borrow.objects.filter(book_take_date__gte=date_from, book_take_date__lte=date_to)
+
+
+def _late_q(today):
+    return Q(returned_at__gt=F('book_return_date')) | Q(is_returned=False, book_return_date__lt=today)
+
+
+def _with_library_titles(rows):
+    titles = dict(Library.objects.filter(id__in={row['library'] for row in rows}).values_list('id', 'title'))
+    for row in rows:
+        row['library_title'] = titles.get(row['library'])
+    return rows
+
+
+# monthly volume
+
+def sql_monthly_volume(date_from, date_to):
+    rows = _loans(date_from, date_to).annotate(month=TruncMonth('book_take_date')).order_by().values(
+        'month', 'library'
+    ).annotate(borrows=Count('*')).order_by('month', 'library')
+    return _with_library_titles([
+        {'month': row['month'].strftime('%Y-%m'), 'library': row['library'], 'borrows': row['borrows']}
+        for row in rows
+    ])
+
+
+def columnar_monthly_volume(date_from, date_to):
+    columns = Columns(_loans(date_from, date_to))
+    months = columns.taken.astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+    # one key per (month, library), sorted like the SQL ORDER BY month, library
+    keys, counts = np.unique(months * len(columns.libraries) + columns.library, return_counts=True)
+    month_keys, library_codes = np.divmod(keys, max(len(columns.libraries), 1))
+    month_labels = np.datetime_as_string(month_keys.astype('datetime64[M]'))
+    return _with_library_titles([
+        {'month': month, 'library': library, 'borrows': borrows}
+        for month, library, borrows in zip(
+            month_labels.tolist(), columns.libraries[library_codes].tolist(), counts.tolist()
+        )
+    ])
+
+
+# genre popularity
+
+def sql_genre_popularity(date_from, date_to):
+    rows = _loans(date_from, date_to).order_by().values('book__Genre').annotate(borrows=Count('*'))
+    rows = [{'genre': row['book__Genre'], 'borrows': row['borrows']} for row in rows]
+    return sorted(rows, key=lambda row: (-row['borrows'], row['genre'] or ''))
+
+
+def columnar_genre_popularity(date_from, date_to):
+    columns = Columns(_loans(date_from, date_to))
+    counts = np.bincount(columns.genre, minlength=len(columns.genres)).tolist()
+    rows = [{'genre': genre, 'borrows': counts[code]} for code, genre in enumerate(columns.genres) if counts[code]]
+    return sorted(rows, key=lambda row: (-row['borrows'], row['genre'] or ''))
+
+
+# loan duration
+
+def sql_loan_duration(date_from, date_to):
+    if connections[Borrow.objects.db].vendor != 'postgresql':
+        # PERCENTILE_CONT and integer date arithmetic are PostgreSQL only
+        return columnar_loan_duration(date_from, date_to)
+    days = DateDiff('returned_at', 'book_take_date')
+    rows = _loans(date_from, date_to).filter(returned_at__isnull=False).order_by().values('library').annotate(
+        returned=Count('*'),
+        avg_days=Avg(days),
+        **{f'p{int(fraction * 100)}_days': PercentileCont(days, fraction) for fraction in PERCENTILES}
+    ).order_by('library')
+    return _with_library_titles([dict(row) for row in rows])
+
+
+def columnar_loan_duration(date_from, date_to):
+    columns = Columns(_loans(date_from, date_to))
+    returned = columns.returned != NO_DATE
+    library = columns.library[returned]
+    days = columns.returned[returned] - columns.taken[returned]
+    codes, percentiles = group_percentiles(library, days, PERCENTILES)
+    counts = np.bincount(library, minlength=len(columns.libraries))[codes]
+    totals = np.bincount(library, weights=days, minlength=len(columns.libraries))[codes]
+    rows = [
+        {'library': library_id, 'returned': count, 'avg_days': total / count}
+        for library_id, count, total in zip(columns.libraries[codes].tolist(), counts.tolist(), totals.tolist())
+    ]
+    for fraction in PERCENTILES:
+        for row, value in zip(rows, percentiles[fraction].tolist()):
+            row[f'p{int(fraction * 100)}_days'] = value
+    return _with_library_titles(rows)
+
+
+# late returns
+
+def sql_late_returns(date_from, date_to):
+    rows = _loans(date_from, date_to).order_by().values('library').annotate(
+        loans=Count('*'),
+        late=Count('id', filter=_late_q(timezone.localdate())),
+    ).order_by('library')
+    return _with_library_titles([
+        {**row, 'late_rate': row['late'] / row['loans']} for row in rows
+    ])
+
+
+def columnar_late_returns(date_from, date_to):
+    columns = Columns(_loans(date_from, date_to))
+    today = (timezone.localdate() - EPOCH).days
+    late = ((columns.returned != NO_DATE) & (columns.returned > columns.due)) | (
+        ~columns.is_returned & (columns.due < today)
+    )
+    loans = np.bincount(columns.library, minlength=len(columns.libraries)).tolist()
+    late = np.bincount(columns.library, weights=late, minlength=len(columns.libraries)).astype(np.int64).tolist()
+    return _with_library_titles([
+        {'library': library, 'loans': loans[code], 'late': late[code], 'late_rate': late[code] / loans[code]}
+        for code, library in enumerate(columns.libraries.tolist())
+    ])
+
+
+REPORTS = {
+    'monthly_volume': {'sql': sql_monthly_volume, 'columnar': columnar_monthly_volume},
+    'genre_popularity': {'sql': sql_genre_popularity, 'columnar': columnar_genre_popularity},
+    'loan_duration': {'sql': sql_loan_duration, 'columnar': columnar_loan_duration},
+    'late_returns': {'sql': sql_late_returns, 'columnar': columnar_late_returns},
+}
+
+
+def get_backend(report):
+    return getattr(settings, 'LIBRARY_ANALYTICS_BACKENDS', {}).get(report, 'sql')
+
+
+def get_report(report, date_from, date_to):
+    """ Cached report rows for loans taken between date_from and date_to. """
+    backend = get_backend(report)
+    key = f'library:analytics:{report}:{backend}:{date_from.isoformat()}:{date_to.isoformat()}'
+    data = cache.get(key)
+    if data is None:
+        data = REPORTS[report][backend](date_from, date_to)
+        closed = date_to < timezone.localdate()
+        cache.set(key, data, timeout=CLOSED_PERIOD_TIMEOUT if closed else OPEN_PERIOD_TIMEOUT)
+    return data
@@ -0,0 +1,20 @@
+""" Version of the public book catalog, used as ETag of catalog responses.
+
+Any change of books, their authors, categories, libraries, publishers or reviews
+moves the version (see library.signals), so clients and proxies can revalidate
+with If-None-Match and get 304 without a single query.
+"""
+from first_project.cache_version import get_version, bump_version
+
+BOOK_CATALOG_VERSION_KEY = 'library:book_catalog_version'
+BOOK_CATALOG_MAX_AGE = 60
+
+
+def get_book_catalog_version():
+    """ Current global book catalog version. """
+    return get_version(BOOK_CATALOG_VERSION_KEY)
+
+
+def bump_book_catalog_version():
+    """ Invalidate cached catalog responses. """
+    bump_version(BOOK_CATALOG_VERSION_KEY)
@@ -0,0 +1,14 @@
+import django_filters
+from .models import Book, genre_choice
+
+
+class BookCatalogFilter(django_filters.FilterSet):
+    # plain id filters: no query to validate the related object
+    genre = django_filters.ChoiceFilter(field_name='Genre', choices=list(genre_choice.items()))
+    category = django_filters.NumberFilter(field_name='category_id')
+    library = django_filters.NumberFilter(field_name='libraries__id')
+    author = django_filters.NumberFilter(field_name='author_id')
+
+    class Meta:
+        model = Book
+        fields = ['genre', 'category', 'library', 'author']
@@ -0,0 +1,45 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+from library.analytics import REPORTS, get_backend
+
+
+class Command(BaseCommand):
+    help = (
+        'Time the sql and columnar implementation of every analytics report on a period, '
+        'to choose settings.LIBRARY_ANALYTICS_BACKENDS.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='date_from', required=True, help='YYYY-MM-DD')
+        parser.add_argument('--to', dest='date_to', required=True, help='YYYY-MM-DD')
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per implementation, the best is kept.')
+        parser.add_argument('--report', choices=sorted(REPORTS), help='Only this report.')
+
+    def handle(self, *args, **options):
+        date_from = parse_date(options['date_from'])
+        date_to = parse_date(options['date_to'])
+        if not date_from or not date_to or date_from > date_to:
+            raise CommandError('--from and --to must be ordered YYYY-MM-DD dates.')
+
+        recommended = {}
+        for report in [options['report']] if options['report'] else sorted(REPORTS):
+            timings = {}
+            results = {}
+            for backend, compute in REPORTS[report].items():
+                best = None
+                for _ in range(options['repeat']):
+                    started = time.perf_counter()
+                    results[backend] = compute(date_from, date_to)
+                    elapsed = time.perf_counter() - started
+                    best = elapsed if best is None else min(best, elapsed)
+                timings[backend] = best
+            fastest = min(timings, key=timings.get)
+            recommended[report] = fastest
+            same = 'same result' if results['sql'] == results['columnar'] else 'RESULTS DIFFER'
+            self.stdout.write(
+                f'{report}: ' + ', '.join(f'{backend} {seconds * 1000:.1f} ms' for backend, seconds in timings.items())
+                + f' -> {fastest} (current: {get_backend(report)}, {same})'
+            )
+
+        self.stdout.write(self.style.SUCCESS(f'LIBRARY_ANALYTICS_BACKENDS = {recommended!r}'))
@@ -0,0 +1,146 @@
+import csv
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from library.models import (
+    Library,
+    Member,
+    MEMBER_MIN_AGE,
+    MEMBER_MAX_AGE,
+    calculate_age,
+    gender_choices,
+    role_choices,
+    )
+
+REQUIRED_COLUMNS = ('first_name', 'last_name', 'email', 'gender', 'date_of_birth', 'role')
+
+
+class Command(BaseCommand):
+    help = (
+        'Bulk import members from a CSV file with columns '
+        'first_name,last_name,email,gender,date_of_birth,role and optional active, '
+        'libraries (library ids separated by ";"). Rows are validated in Python and '
+        'inserted with bulk_create, one transaction per batch. Rows with an email '
+        'that is already registered are reported and skipped.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV file.')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Members per INSERT/transaction.')
+        parser.add_argument(
+            '--skip-existing', action='store_true', help='Skip already registered emails without reporting each row.'
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Only validate the file.')
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        genders = {code for code, _ in gender_choices}
+        roles = {code for code, _ in role_choices}
+        library_ids = set(Library.objects.values_list('id', flat=True))
+
+        with open(options['path'], newline='', encoding='utf-8') as csv_file:
+            reader = csv.DictReader(csv_file)
+            missing = set(REQUIRED_COLUMNS) - set(reader.fieldnames or ())
+            if missing:
+                raise CommandError(f'Missing columns: {", ".join(sorted(missing))}.')
+
+            batch, imported, skipped, existing = [], 0, 0, 0
+            seen = set()
+            for line, row in enumerate(reader, start=2):
+                error = self.validate_row(row, today, genders, roles, library_ids, seen)
+                if error:
+                    skipped += 1
+                    self.stderr.write(f'Line {line}: {error}')
+                    continue
+                seen.add(row['email'].lower())
+                batch.append((line, row))
+                if len(batch) >= options['batch_size']:
+                    imported, existing = self.import_batch(batch, options, imported, existing)
+                    batch = []
+            if batch:
+                imported, existing = self.import_batch(batch, options, imported, existing)
+
+        action = 'validated' if options['dry_run'] else 'imported'
+        self.stdout.write(self.style.SUCCESS(
+            f'Done, {imported} members {action}, {skipped} invalid rows skipped, '
+            f'{existing} already registered skipped.'
+        ))
+
+    def validate_row(self, row, today, genders, roles, library_ids, seen):
+        """ Error message for an invalid row, None if it can be imported. """
+        for column in REQUIRED_COLUMNS:
+            if not (row.get(column) or '').strip():
+                return f'"{column}" is empty.'
+        try:
+            validate_email(row['email'])
+        except ValidationError:
+            return f'invalid email "{row["email"]}".'
+        if row['email'].lower() in seen:
+            return f'duplicate email "{row["email"]}".'
+        if row['gender'] not in genders:
+            return f'gender must be one of {", ".join(sorted(genders))}.'
+        if row['role'] not in roles:
+            return f'role must be one of {", ".join(sorted(roles))}.'
+        date_of_birth = parse_date(row['date_of_birth'])
+        if date_of_birth is None:
+            return 'date_of_birth must be YYYY-MM-DD.'
+        if not MEMBER_MIN_AGE <= calculate_age(date_of_birth, today) <= MEMBER_MAX_AGE:
+            return f'age must be between {MEMBER_MIN_AGE} and {MEMBER_MAX_AGE}.'
+        for pk in (row.get('libraries') or '').split(';'):
+            if pk.strip() and (not pk.strip().isdigit() or int(pk) not in library_ids):
+                return f'unknown library "{pk.strip()}".'
+        return None
+
+    def import_batch(self, batch, options, imported, existing):
+        """ Insert the new members of a batch, return updated (imported, existing) totals. """
+        registered = set(Member.objects.filter(
+            email__in=[row['email'].strip() for _, row in batch]
+        ).values_list('email', flat=True))
+        rows = []
+        for line, row in batch:
+            if row['email'].strip() in registered:
+                existing += 1
+                if not options['skip_existing']:
+                    self.stderr.write(f'Line {line}: email "{row["email"]}" is already registered.')
+            else:
+                rows.append(row)
+
+        members = [
+            Member(
+                first_name=row['first_name'].strip(),
+                last_name=row['last_name'].strip(),
+                email=row['email'].strip(),
+                gender=row['gender'],
+                date_of_birth=parse_date(row['date_of_birth']),
+                role=row['role'],
+                active=(row.get('active') or 'true').strip().lower() in ('1', 'true', 'yes'),
+            )
+            for row in rows
+        ]
+        if options['dry_run'] or not members:
+            return imported + len(members), existing
+
+        try:
+            with transaction.atomic():
+                created = self.create_members(members, rows)
+        except IntegrityError as error:
+            # an email registered by someone else since the lookup above
+            raise CommandError(
+                f'Batch starting at line {batch[0][0]} conflicts with existing members, '
+                f'{imported} members were imported before it: {error}'
+            )
+        self.stdout.write(f'Imported batch of {len(created)} members.')
+        return imported + len(created), existing
+
+    def create_members(self, members, rows):
+        created = Member.objects.bulk_create(members)
+        # bulk_create returns the ids on PostgreSQL, members are in the order of rows
+        Member.libraries.through.objects.bulk_create([
+            Member.libraries.through(member_id=member.id, library_id=int(pk))
+            for member, row in zip(created, rows)
+            for pk in (row.get('libraries') or '').split(';') if pk.strip()
+        ], ignore_conflicts=True)
+        return created
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from library.models import Author, Book, Library, SearchDocument
+from library.search import index_objects
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the search documents of all books, authors and libraries, in id batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000, help='Objects per transaction.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        for kind, model in (
+            (SearchDocument.BOOK, Book),
+            (SearchDocument.AUTHOR, Author),
+            (SearchDocument.LIBRARY, Library),
+        ):
+            total = 0
+            last_id = 0
+            while True:
+                ids = list(model.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size])
+                if not ids:
+                    break
+                index_objects(kind, ids)
+                total += len(ids)
+                last_id = ids[-1]
+            # documents of objects deleted without signals
+            stale, _ = SearchDocument.objects.filter(kind=kind).exclude(
+                object_id__in=model.objects.values('id')
+            ).delete()
+            self.stdout.write(f'Indexed {total} {kind} documents, removed {stale} stale.')
+
+        self.stdout.write(self.style.SUCCESS('Done.'))
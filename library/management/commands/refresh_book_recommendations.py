@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from library.recommendations import TOP_K, refresh_book_neighbours
+
+
+class Command(BaseCommand):
+    help = 'Refresh "also borrowed" book neighbours for borrows added since the last run.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Recompute all books, e.g. weekly.')
+        parser.add_argument('--top-k', type=int, default=TOP_K, help='Neighbours stored per book.')
+        parser.add_argument('--chunk-size', type=int, default=500, help='Books recomputed per transaction.')
+
+    def handle(self, *args, **options):
+        books, stored = refresh_book_neighbours(
+            full=options['full'],
+            top_k=options['top_k'],
+            chunk_size=options['chunk_size'],
+        )
+        self.stdout.write(self.style.SUCCESS(f'Done, {stored} neighbours stored for {books} books.'))
@@ -0,0 +1,23 @@
+from django.db import transaction
+from django.db.models import Max
+from django.core.management.base import BaseCommand
+from library.models import Book
+
+
+class Command(BaseCommand):
+    help = 'Recompute denormalized Book rating counters from the reviews, in id batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Books per transaction.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        max_id = Book.objects.aggregate(max_id=Max('id'))['max_id'] or 0
+
+        total = 0
+        for start in range(0, max_id + 1, batch_size):
+            with transaction.atomic():
+                total += Book.objects.filter(id__gte=start, id__lt=start + batch_size).recalculate_rating()
+            self.stdout.write(f'Recalculated books up to id {min(start + batch_size - 1, max_id)} ({total} total).')
+
+        self.stdout.write(self.style.SUCCESS(f'Done, {total} books recalculated.'))
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from library.models import Borrow, OverdueSnapshot
+
+
+class Command(BaseCommand):
+    help = 'Materialise overdue loan counts per library and member for a day. Meant to run nightly from cron.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Day to snapshot (YYYY-MM-DD), today by default.')
+
+    def handle(self, *args, **options):
+        date = timezone.localdate()
+        if options['date']:
+            date = parse_date(options['date'])
+            if date is None:
+                raise CommandError('--date must be YYYY-MM-DD.')
+
+        snapshots = [
+            OverdueSnapshot(
+                date=date,
+                library_id=row['library'],
+                member_id=row['member'],
+                overdue_count=row['overdue_count'],
+                oldest_return_date=row['oldest_return_date'],
+            )
+            for row in Borrow.objects.overdue_counts(today=date).iterator()
+        ]
+        # re-running for the same day replaces its snapshot
+        with transaction.atomic():
+            OverdueSnapshot.objects.filter(date=date).delete()
+            OverdueSnapshot.objects.bulk_create(snapshots, batch_size=1000)
+
+        total = sum(snapshot.overdue_count for snapshot in snapshots)
+        self.stdout.write(self.style.SUCCESS(
+            f'Done, {total} overdue loans of {len(snapshots)} members snapshotted for {date}.'
+        ))
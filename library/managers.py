@@ -0,0 +1,71 @@
+from django.db import models
+from django.db.models import Case, Count, F, Min, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, ExtractDay, ExtractMonth, ExtractYear, Now
+from django.utils import timezone
+
+
+def age_expression(today=None):
+    """ Full years between date_of_birth and today (a date, the DB's current date by default). """
+    if today is None:
+        year, month, day = ExtractYear(Now()), ExtractMonth(Now()), ExtractDay(Now())
+    else:
+        year, month, day = Value(today.year), Value(today.month), Value(today.day)
+    birthday_passed = Q(date_of_birth__month__lt=month) | Q(date_of_birth__month=month, date_of_birth__day__lte=day)
+    return year - ExtractYear('date_of_birth') - Case(
+        When(birthday_passed, then=Value(0)),
+        default=Value(1),
+        output_field=models.IntegerField()
+    )
+
+
+class BookQuerySet(models.QuerySet):
+    def with_rating(self):
+        """ Average review rating as `rating_avg`, usable in filter() and order_by(). """
+        return self.annotate(
+            rating_avg=Case(
+                When(rating_count=0, then=None),
+                default=F('rating_sum') / F('rating_count'),
+                output_field=models.FloatField()
+            )
+        )
+
+    def recalculate_rating(self):
+        """ Recompute rating_sum / rating_count from the reviews with one UPDATE. """
+        from .models import Review
+
+        reviews = Review.objects.filter(book=OuterRef('pk')).order_by().values('book')
+        return self.update(
+            rating_sum=Coalesce(Subquery(reviews.annotate(total=Sum('rating')).values('total')), 0.0),
+            rating_count=Coalesce(Subquery(reviews.annotate(total=Count('id')).values('total')), 0),
+        )
+
+    recalculate_rating.alters_data = True
+
+
+class BorrowQuerySet(models.QuerySet):
+    def overdue(self, today=None):
+        """ Not returned loans whose return date has passed, a range scan on borrow_overdue_idx. """
+        return self.filter(is_returned=False, book_return_date__lt=today or timezone.localdate())
+
+    def overdue_counts(self, today=None):
+        """ Overdue loans grouped by library and member: library, member, overdue_count, oldest_return_date. """
+        return self.overdue(today).order_by().values('library', 'member').annotate(
+            overdue_count=Count('*'),
+            oldest_return_date=Min('book_return_date'),
+        )
+
+
+class MemberQuerySet(models.QuerySet):
+    def with_age(self, today=None):
+        """ Age in full years as `age`, usable in filter() and order_by(). """
+        return self.annotate(age=age_expression(today or timezone.localdate()))
+
+
+class PostQuerySet(models.QuerySet):
+    def pending(self):
+        """ Posts waiting for moderation, served by post_pending_idx. """
+        return self.filter(moderated=False)
+
+    def claimable(self, expired_before):
+        """ Pending posts nobody claimed, or whose claim is older than expired_before. """
+        return self.pending().filter(Q(claimed_at__isnull=True) | Q(claimed_at__lt=expired_before))
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.1 on 2026-10-19 14:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("library", "0006_authordetail_borrow_event_eventparticipant_post_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="author",
+            name="deleted_at",
+            field=models.DateTimeField(
+                default=None, null=True, verbose_name="Deleted At"
+            ),
+        ),
+    ]
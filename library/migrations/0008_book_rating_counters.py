@@ -0,0 +1,49 @@
+# Book.rating moves from a per-access AVG() to counters kept by Review save/delete.
+# Counters are backfilled in short batches; manage.py repair_book_ratings
+# recomputes them later if they ever drift.
+
+from django.db import migrations, models, transaction
+from django.db.models import Count, Max, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+BATCH_SIZE = 1_000
+
+
+def backfill_rating(apps, schema_editor):
+    db_alias = schema_editor.connection.alias
+    Book = apps.get_model("library", "Book")
+    Review = apps.get_model("library", "Review")
+    reviews = Review.objects.using(db_alias).filter(book=OuterRef("pk")).order_by().values("book")
+    max_id = Book.objects.using(db_alias).aggregate(max_id=Max("id"))["max_id"] or 0
+    for start in range(0, max_id + 1, BATCH_SIZE):
+        with transaction.atomic(using=db_alias):
+            Book.objects.using(db_alias).filter(id__gte=start, id__lt=start + BATCH_SIZE).update(
+                rating_sum=Coalesce(Subquery(reviews.annotate(total=Sum("rating")).values("total")), 0.0),
+                rating_count=Coalesce(Subquery(reviews.annotate(total=Count("id")).values("total")), 0),
+            )
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("library", "0007_author_deleted_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="book",
+            name="rating_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="Number of Reviews"
+            ),
+        ),
+        migrations.AddField(
+            model_name="book",
+            name="rating_sum",
+            field=models.FloatField(
+                default=0, editable=False, verbose_name="Sum of Review Ratings"
+            ),
+        ),
+        migrations.RunPython(backfill_rating, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.1 on 2026-10-19 14:14
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("library", "0008_book_rating_counters"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="book",
+            index=models.Index(fields=["Genre", "-id"], name="book_genre_id_idx"),
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.2.1 on 2026-10-19 14:15
+
+import django.db.models.deletion
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("library", "0009_book_genre_id_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OverdueSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField(verbose_name="Date")),
+                (
+                    "overdue_count",
+                    models.PositiveIntegerField(verbose_name="Overdue Loans"),
+                ),
+                (
+                    "oldest_return_date",
+                    models.DateField(verbose_name="Oldest Return Date"),
+                ),
+            ],
+        ),
+        AddIndexConcurrently(
+            model_name="borrow",
+            index=models.Index(
+                condition=models.Q(("is_returned", False)),
+                fields=["book_return_date"],
+                include=("library", "member"),
+                name="borrow_overdue_idx",
+            ),
+        ),
+        migrations.AddField(
+            model_name="overduesnapshot",
+            name="library",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                to="library.library",
+                verbose_name="Library",
+            ),
+        ),
+        migrations.AddField(
+            model_name="overduesnapshot",
+            name="member",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                to="library.member",
+                verbose_name="Member",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="overduesnapshot",
+            constraint=models.UniqueConstraint(
+                fields=("date", "library", "member"), name="overdue_snapshot_unique"
+            ),
+        ),
+    ]
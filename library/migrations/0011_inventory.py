@@ -0,0 +1,101 @@
+# Generated by Django 5.2.1 on 2026-10-19 14:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+BATCH_SIZE = 1_000
+
+
+def create_inventory(apps, schema_editor):
+    """ One row per book listed in a library or lent from it, one copy
+    unless more copies are lent out right now. """
+    db_alias = schema_editor.connection.alias
+    Book = apps.get_model("library", "Book")
+    Borrow = apps.get_model("library", "Borrow")
+    Inventory = apps.get_model("library", "Inventory")
+
+    lent = {
+        (row["book_id"], row["library_id"]): row["lent"]
+        for row in Borrow.objects.using(db_alias).filter(is_returned=False).order_by()
+        .values("book_id", "library_id").annotate(lent=Count("id"))
+    }
+    listed = Book.libraries.through.objects.using(db_alias).values_list("book_id", "library_id")
+    pairs = set(listed.iterator()) | set(lent)
+
+    rows = []
+    for book_id, library_id in pairs:
+        copies = max(lent.get((book_id, library_id), 0), 1)
+        rows.append(Inventory(
+            book_id=book_id,
+            library_id=library_id,
+            copies=copies,
+            available=copies - lent.get((book_id, library_id), 0),
+        ))
+    Inventory.objects.using(db_alias).bulk_create(rows, batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("library", "0010_borrow_overdue"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Inventory",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "copies",
+                    models.PositiveIntegerField(default=1, verbose_name="Copies"),
+                ),
+                (
+                    "available",
+                    models.PositiveIntegerField(
+                        default=1, verbose_name="Available Copies"
+                    ),
+                ),
+                (
+                    "book",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="inventory",
+                        to="library.book",
+                        verbose_name="Book",
+                    ),
+                ),
+                (
+                    "library",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="inventory",
+                        to="library.library",
+                        verbose_name="Library",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "Inventory",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("book", "library"), name="inventory_book_library_unique"
+                    ),
+                    models.CheckConstraint(
+                        condition=models.Q(("available__lte", models.F("copies"))),
+                        name="inventory_available_lte_copies",
+                        violation_error_message="Available copies cannot exceed copies.",
+                    ),
+                ],
+            },
+        ),
+        migrations.RunPython(create_inventory, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.1 on 2026-10-19 14:17
+
+import datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("library", "0011_inventory"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="member",
+            name="age",
+        ),
+        migrations.AddConstraint(
+            model_name="member",
+            constraint=models.CheckConstraint(
+                condition=models.Q(("date_of_birth__gte", datetime.date(1900, 1, 1))),
+                name="member_date_of_birth_min",
+                violation_error_message="Date of birth must not be before 1900-01-01",
+            ),
+        ),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 5.2.1 on 2026-10-19 14:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("library", "0012_member_computed_age"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="JobCheckpoint",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "name",
+                    models.CharField(max_length=100, unique=True, verbose_name="Job"),
+                ),
+                (
+                    "position",
+                    models.BigIntegerField(default=0, verbose_name="Position"),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="Updated At"),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="BookNeighbour",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "co_borrowers",
+                    models.PositiveIntegerField(verbose_name="Co-borrowers"),
+                ),
+                ("score", models.FloatField(verbose_name="Cosine Score")),
+                ("rank", models.PositiveSmallIntegerField(verbose_name="Rank")),
+                (
+                    "book",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="neighbours",
+                        to="library.book",
+                        verbose_name="Book",
+                    ),
+                ),
+                (
+                    "neighbour",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="library.book",
+                        verbose_name="Also Borrowed",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("book", "rank"), name="book_neighbour_rank_unique"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.1 on 2026-10-19 14:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("library", "0013_book_neighbours"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="borrow",
+            name="returned_at",
+            field=models.DateField(
+                blank=True, editable=False, null=True, verbose_name="Returned At"
+            ),
+        ),
+    ]
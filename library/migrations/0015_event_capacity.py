@@ -0,0 +1,70 @@
+# Events get capacity and a participant counter. Duplicate registrations are
+# removed (the oldest one is kept) before (event, member) becomes unique, and
+# counters are backfilled from the remaining registrations.
+
+from django.db import migrations, models
+from django.db.models import Count, Min, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def dedupe_and_count(apps, schema_editor):
+    db_alias = schema_editor.connection.alias
+    Event = apps.get_model("library", "Event")
+    EventParticipant = apps.get_model("library", "EventParticipant")
+    participants = EventParticipant.objects.using(db_alias)
+
+    keep = participants.order_by().values("event", "member").annotate(first_id=Min("id"), total=Count("id"))
+    duplicates = keep.filter(total__gt=1)
+    for row in duplicates.iterator():
+        participants.filter(event=row["event"], member=row["member"]).exclude(id=row["first_id"]).delete()
+
+    counts = participants.filter(event=OuterRef("pk")).order_by().values("event").annotate(
+        total=Count("id")
+    ).values("total")
+    Event.objects.using(db_alias).update(participant_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("library", "0014_borrow_returned_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="event",
+            name="capacity",
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text="Leave empty for unlimited places",
+                null=True,
+                verbose_name="Capacity",
+            ),
+        ),
+        migrations.AddField(
+            model_name="event",
+            name="participant_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="Participants"
+            ),
+        ),
+        migrations.RunPython(dedupe_and_count, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="event",
+            constraint=models.CheckConstraint(
+                condition=models.Q(
+                    ("capacity__isnull", True),
+                    ("participant_count__lte", models.F("capacity")),
+                    _connector="OR",
+                ),
+                name="event_participants_lte_capacity",
+                violation_error_message="Capacity cannot be lower than the number of participants.",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="eventparticipant",
+            constraint=models.UniqueConstraint(
+                fields=("event", "member"), name="event_participant_unique"
+            ),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.1 on 2026-10-19 14:22
+
+import django.db.models.deletion
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("library", "0015_event_capacity"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="claimed_at",
+            field=models.DateTimeField(
+                blank=True, editable=False, null=True, verbose_name="Claimed at"
+            ),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="claimed_by",
+            field=models.ForeignKey(
+                blank=True,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to=settings.AUTH_USER_MODEL,
+                verbose_name="Claimed by",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="post",
+            index=models.Index(
+                condition=models.Q(("moderated", False)),
+                fields=["created_at", "id"],
+                name="post_pending_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="post",
+            index=models.Index(
+                condition=models.Q(("moderated", True)),
+                fields=["library", "-created_at", "-id"],
+                name="post_library_feed_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.1 on 2026-10-19 14:43
+
+import django.db.models.manager
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("library", "0017_search_documents"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="author",
+            options={"base_manager_name": "all_objects"},
+        ),
+        migrations.AlterModelManagers(
+            name="author",
+            managers=[
+                ("objects", django.db.models.manager.Manager()),
+                ("all_objects", django.db.models.manager.Manager()),
+            ],
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.1 on 2026-10-19 16:40
+
+import django.utils.timezone
+from django.contrib.postgres.indexes import BrinIndex
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("library", "0019_author_base_manager"),
+    ]
+
+    operations = [
+        # existing loans get the migration time, the next recommendations run is a full one anyway
+        migrations.AddField(
+            model_name="borrow",
+            name="created_at",
+            field=models.DateTimeField(
+                auto_now_add=True,
+                default=django.utils.timezone.now,
+                verbose_name="Created At",
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="jobcheckpoint",
+            name="processed_until",
+            field=models.DateTimeField(
+                blank=True, null=True, verbose_name="Processed Until"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="borrow",
+            index=BrinIndex(fields=["created_at"], name="borrow_created_at_brin"),
+        ),
+    ]
@@ -1,11 +1,17 @@
 #from django.contrib.auth import aget_user
-from django.core.exceptions import ValidationError
-from django.db import models
+import datetime
+from django.conf import settings
+from django.db import models, transaction
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.utils import timezone
+from django.contrib.postgres.indexes import BrinIndex, GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
+from first_project.soft_delete import SoftDeleteModel
+from django.core.exceptions import ValidationError
+from .managers import BookQuerySet, BorrowQuerySet, MemberQuerySet, PostQuerySet
 
 
-class Author(models.Model):
+class Author(SoftDeleteModel):
     first_name = models.CharField(max_length=100, verbose_name="First Name")
     last_name = models.CharField(max_length=100, verbose_name="Last Name")
     date_of_birth = models.DateField(null=True, blank=True, verbose_name="Date of Birth")
@@ -24,9 +30,21 @@ class Author(models.Model):
         verbose_name="Rating in AWS",
     )
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # name stored in the DB, book search documents are refreshed only when it changes
+        loaded = dict(zip(field_names, values))
+        instance._loaded_name = (loaded.get('first_name'), loaded.get('last_name'))
+        return instance
+
     def __str__(self):
         return f'{self.first_name} {self.last_name}'
 
+    class Meta:
+        # book.author and FK validation must still find soft-deleted authors
+        base_manager_name = 'all_objects'
+
 genre_choice = {
     'Fiction' : 'Fiction',
     'Non Fiction' : 'Non-Fiction',
@@ -49,13 +67,25 @@ class Book(models.Model):
     publisher = models.ForeignKey("Member", on_delete=models.SET_NULL, verbose_name="Publisher", null=True)
     category = models.ForeignKey('Category', on_delete=models.SET_NULL, verbose_name="Category", null=True, related_name='books')
     libraries = models.ManyToManyField("Library", related_name='books', verbose_name="Library")
+    # maintained by Review save/delete, see library.signals
+    rating_sum = models.FloatField(default=0, editable=False, verbose_name="Sum of Review Ratings")
+    rating_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Number of Reviews")
+
+    objects = BookQuerySet.as_manager()
+
     @property
     def rating(self):
-        return self.reviews.all().aggregate(models.Avg('rating'))['rating__avg']
+        return self.rating_sum / self.rating_count if self.rating_count else None
 
     def __str__(self):
         return f'{self.title}'
 
+    class Meta:
+        indexes = [
+            # catalog API: genre filter with keyset pagination on id
+            models.Index(fields=['Genre', '-id'], name='book_genre_id_idx'),
+        ]
+
 
 # class Publisher(models.Model):
 #     name = models.CharField(max_length=100)
@@ -98,27 +128,60 @@ role_choices = [
 ]
 
 
+MEMBER_MIN_AGE = 6
+MEMBER_MAX_AGE = 120
+# time independent lower bound kept by the database, the age range is checked in Member.clean()
+MEMBER_MIN_DATE_OF_BIRTH = datetime.date(1900, 1, 1)
+
+
+def calculate_age(date_of_birth, today=None):
+    """ Full years on today, same rule as managers.age_expression. """
+    today = today or timezone.localdate()
+    return today.year - date_of_birth.year - ((today.month, today.day) < (date_of_birth.month, date_of_birth.day))
+
+
 class Member(models.Model):
     first_name = models.CharField(max_length=50, verbose_name="First Name")
     last_name = models.CharField(max_length=50, verbose_name="Last Name")
     email = models.EmailField(null=False, blank=False, verbose_name="Email", unique=True)
     gender = models.CharField(max_length=20, verbose_name="Gender", choices=gender_choices)
     date_of_birth = models.DateField(verbose_name="Date of Birth")
-    age = models.PositiveIntegerField(verbose_name="Age", editable=False)
     role = models.CharField(max_length=30, verbose_name="Role", choices=role_choices)
     active = models.BooleanField(default=True, verbose_name="Is_active")
     libraries = models.ManyToManyField("Library", related_name='members', verbose_name="Library")
 
-    def save(self, *args, **kwargs):
-        ages = timezone.now().year - self.date_of_birth.year
-        if 6 <= ages < 120:
-            self.age = ages
-            super().save(*args, **kwargs)
-        else:
-            raise ValidationError("Age must be between 6 and 120")
+    objects = MemberQuerySet.as_manager()
+
+    @property
+    def age(self):
+        # in querysets use Member.objects.with_age()
+        if '_age' in self.__dict__:
+            return self._age
+        return calculate_age(self.date_of_birth) if self.date_of_birth else None
+
+    @age.setter
+    def age(self, value):
+        # value annotated by with_age()
+        self._age = value
+
+    def clean(self):
+        # depends on today, so not a CHECK: members age out of the range over time
+        if self.date_of_birth and not MEMBER_MIN_AGE <= self.age <= MEMBER_MAX_AGE:
+            raise ValidationError(
+                {'date_of_birth': f'Age must be between {MEMBER_MIN_AGE} and {MEMBER_MAX_AGE}'}
+            )
 
     def __str__(self):
         return f'{self.first_name} {self.last_name}'
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(date_of_birth__gte=MEMBER_MIN_DATE_OF_BIRTH),
+                name='member_date_of_birth_min',
+                violation_error_message=f'Date of birth must not be before {MEMBER_MIN_DATE_OF_BIRTH}',
+            ),
+        ]
     
 
 class Post(models.Model):
@@ -129,6 +192,78 @@ class Post(models.Model):
     moderated = models.BooleanField(default=False, verbose_name="Moderated?")
     library = models.ForeignKey('Library', on_delete=models.CASCADE, verbose_name="Library")
     updated_at = models.DateTimeField(auto_now=True)
+    # moderation queue, see library.services.claim_posts
+    claimed_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True,
+                                   editable=False, related_name='+', verbose_name="Claimed by")
+    claimed_at = models.DateTimeField(null=True, blank=True, editable=False, verbose_name="Claimed at")
+
+    objects = PostQuerySet.as_manager()
+
+    def __str__(self):
+        return f'{self.title}'
+
+    class Meta:
+        indexes = [
+            # moderation queue: only pending posts, oldest first
+            models.Index(fields=['created_at', 'id'], condition=models.Q(moderated=False), name='post_pending_idx'),
+            # library feed: moderated posts, newest first, keyset on (created_at, id)
+            models.Index(
+                fields=['library', '-created_at', '-id'],
+                condition=models.Q(moderated=True),
+                name='post_library_feed_idx',
+            ),
+        ]
+
+
+class Inventory(models.Model):
+    """ Copies of a book held by a library. available is changed only by
+    library.services checkout/return with conditional UPDATEs. """
+    book = models.ForeignKey('Book', on_delete=models.CASCADE, verbose_name="Book", related_name='inventory')
+    library = models.ForeignKey('Library', on_delete=models.CASCADE, verbose_name="Library", related_name='inventory')
+    copies = models.PositiveIntegerField(default=1, verbose_name="Copies")
+    available = models.PositiveIntegerField(default=1, verbose_name="Available Copies")
+
+    def __str__(self):
+        return f'{self.book} in {self.library}: {self.available}/{self.copies}'
+
+    class Meta:
+        verbose_name_plural = "Inventory"
+        constraints = [
+            models.UniqueConstraint(fields=['book', 'library'], name='inventory_book_library_unique'),
+            models.CheckConstraint(
+                condition=models.Q(available__lte=models.F('copies')),
+                name='inventory_available_lte_copies',
+                violation_error_message='Available copies cannot exceed copies.',
+            ),
+        ]
+
+
+class BookNeighbour(models.Model):
+    """ Top-K books co-borrowed with a book, stored by library.recommendations. """
+    book = models.ForeignKey('Book', on_delete=models.CASCADE, verbose_name="Book", related_name='neighbours')
+    neighbour = models.ForeignKey('Book', on_delete=models.CASCADE, verbose_name="Also Borrowed", related_name='+')
+    co_borrowers = models.PositiveIntegerField(verbose_name="Co-borrowers")
+    score = models.FloatField(verbose_name="Cosine Score")
+    rank = models.PositiveSmallIntegerField(verbose_name="Rank")
+
+    def __str__(self):
+        return f'{self.book} -> {self.neighbour} ({self.score:.3f})'
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['book', 'rank'], name='book_neighbour_rank_unique'),
+        ]
+
+
+class JobCheckpoint(models.Model):
+    """ Last processed position (a max id or a point in time) of an incremental batch job. """
+    name = models.CharField(max_length=100, unique=True, verbose_name="Job")
+    position = models.BigIntegerField(default=0, verbose_name="Position")
+    processed_until = models.DateTimeField(null=True, blank=True, verbose_name="Processed Until")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Updated At")
+
+    def __str__(self):
+        return f'{self.name}: {self.position}'
 
 
 class Borrow(models.Model):
@@ -138,20 +273,51 @@ class Borrow(models.Model):
     book_take_date = models.DateField(auto_now_add=True, verbose_name="Book Take Date")
     book_return_date = models.DateField(verbose_name="Book Return Date")
     is_returned = models.BooleanField(default=False, verbose_name="Is returned?")
+    # set by library.services.return_borrow, unknown for loans returned before it existed
+    returned_at = models.DateField(null=True, blank=True, editable=False, verbose_name="Returned At")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Created At")
+
+    objects = BorrowQuerySet.as_manager()
 
     def __str__(self):
         return f'{self.member.first_name} {self.member.last_name} took "{self.book.title}" on {self.book_take_date}'
 
     def check_to_date(self):
-        if timezone.now().date() > self.book_return_date and self.is_returned == False:
-            return True
-        else:
-            return False
-    # use python manage.py shell
-    # from library.models import Borrow
-    # a = Borrow.object.get(pk=<borrow id>)
-    # a.check_to_date()
-    # result: True or False
+        """ Same rule as Borrow.objects.overdue(), for a single loaded instance. """
+        return not self.is_returned and timezone.localdate() > self.book_return_date
+    # for many loans use the queryset instead of calling this per row:
+    # Borrow.objects.overdue()
+
+    class Meta:
+        indexes = [
+            # Borrow.objects.overdue(): only open loans are indexed, grouping
+            # columns included for index-only overdue reports
+            models.Index(
+                fields=['book_return_date'],
+                include=['library', 'member'],
+                condition=models.Q(is_returned=False),
+                name='borrow_overdue_idx',
+            ),
+            # borrows created since the last library.recommendations run
+            BrinIndex(fields=['created_at'], name='borrow_created_at_brin'),
+        ]
+
+
+class OverdueSnapshot(models.Model):
+    """ Overdue loan counts per library and member, materialised nightly by snapshot_overdue_borrows. """
+    date = models.DateField(verbose_name="Date")
+    library = models.ForeignKey('Library', on_delete=models.CASCADE, verbose_name="Library")
+    member = models.ForeignKey('Member', on_delete=models.CASCADE, verbose_name="Member")
+    overdue_count = models.PositiveIntegerField(verbose_name="Overdue Loans")
+    oldest_return_date = models.DateField(verbose_name="Oldest Return Date")
+
+    def __str__(self):
+        return f'{self.date}: {self.member} has {self.overdue_count} overdue loans in {self.library}'
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'library', 'member'], name='overdue_snapshot_unique'),
+        ]
 
 
 class Review(models.Model):
@@ -160,6 +326,19 @@ class Review(models.Model):
     rating = models.FloatField(validators=[MinValueValidator(1), MaxValueValidator(5)], verbose_name="Rating")
     review = models.TextField(verbose_name="Review")
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # values stored in the DB, used to correct Book rating counters on update
+        loaded = dict(zip(field_names, values))
+        instance._loaded_rating = (loaded.get('book_id'), loaded.get('rating'))
+        return instance
+
+    def save(self, *args, **kwargs):
+        # review row and Book rating counters change together
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
 
 class AuthorDetail(models.Model):
     author = models.ForeignKey('Author', on_delete=models.CASCADE, verbose_name="Author")
@@ -177,10 +356,34 @@ class Event(models.Model):
     timestamp = models.DateTimeField(verbose_name="Event date")
     library = models.ForeignKey('Library', on_delete=models.CASCADE, verbose_name="Library")
     book = models.ManyToManyField('Book', verbose_name="Books", related_name='events')
+    capacity = models.PositiveIntegerField(null=True, blank=True, verbose_name="Capacity",
+                                           help_text="Leave empty for unlimited places")
+    # maintained by library.services register/cancel with conditional UPDATEs
+    participant_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Participants")
+
+    def clean(self):
+        # participant_count is not editable, so full_clean() skips event_participants_lte_capacity;
+        # the stored count is checked, registrations may have changed it since this instance was loaded
+        if self.capacity is None or self._state.adding:
+            return
+        participant_count = Event.objects.filter(pk=self.pk).values_list('participant_count', flat=True).first() or 0
+        if self.capacity < participant_count:
+            raise ValidationError(
+                {'capacity': f'Capacity cannot be lower than the number of participants ({participant_count}).'}
+            )
 
     def __str__(self):
         return f'{self.name} on {self.timestamp}'
 
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(capacity__isnull=True) | models.Q(participant_count__lte=models.F('capacity')),
+                name='event_participants_lte_capacity',
+                violation_error_message='Capacity cannot be lower than the number of participants.',
+            ),
+        ]
+
 
 class EventParticipant(models.Model):
     event = models.ForeignKey('Event', on_delete=models.CASCADE, verbose_name="Event name")
@@ -188,4 +391,40 @@ class EventParticipant(models.Model):
     register_date = models.DateField(auto_now_add=True, verbose_name="Register date")
 
     def __str__(self):
-        return f'{self.event.name}. Member: {self.member.first_name} {self.member.last_name} registered on {self.register_date}'
\ No newline at end of file
+        return f'{self.event.name}. Member: {self.member.first_name} {self.member.last_name} registered on {self.register_date}'
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['event', 'member'], name='event_participant_unique'),
+        ]
+
+
+class SearchDocument(models.Model):
+    """ Search text of a book, author or library, maintained by library.search. """
+    BOOK = 'book'
+    AUTHOR = 'author'
+    LIBRARY = 'library'
+    KIND_CHOICES = [
+        (BOOK, 'Book'),
+        (AUTHOR, 'Author'),
+        (LIBRARY, 'Library'),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, verbose_name="Type")
+    object_id = models.BigIntegerField(verbose_name="Object ID")
+    title = models.CharField(max_length=255, verbose_name="Title")
+    subtitle = models.CharField(max_length=255, blank=True, verbose_name="Subtitle")
+    body = models.TextField(blank=True, verbose_name="Body")
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    def __str__(self):
+        return f'{self.kind} {self.object_id}: {self.title}'
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='search_document_unique'),
+        ]
+        indexes = [
+            GinIndex(fields=['search_vector'], name='search_document_vector_idx'),
+            GinIndex(OpClass('title', name='gin_trgm_ops'), name='search_document_title_trgm_idx'),
+        ]
@@ -0,0 +1,6 @@
+from rest_framework.permissions import BasePermission
+
+
+class CanModeratePosts(BasePermission):
+    def has_permission(self, request, view):
+        return request.user.has_perm('library.change_post')
@@ -0,0 +1,134 @@
+""" "Members who borrowed this also borrowed": item-item cosine similarity of books.
+
+A book is the set of members that borrowed it. For two books
+    score = co_borrowers / sqrt(borrowers(a) * borrowers(b))
+The (member, book) pairs of all borrows are streamed once per run into NumPy
+arrays. Deduplicated and sorted by member they are a sparse member x book
+matrix (BorrowMatrix), the co-occurrence of a chunk of books is expanded from
+it with vectorized indexing and only the top-K neighbours per book are stored
+in BookNeighbour.
+"""
+from datetime import timedelta
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+from .analytics import fetch_columns
+from .models import BookNeighbour, Borrow, JobCheckpoint
+
+CHECKPOINT = 'library:book_neighbours'
+TOP_K = 10
+# created_at is set before the borrow commits: an incremental run looks back
+# this far before the previous run so borrows of long transactions are not missed
+CHECKPOINT_OVERLAP = timedelta(minutes=15)
+
+
+class BorrowMatrix:
+    """ Distinct (member, book) borrow pairs as index arrays, sorted by member then book.
+
+    self.book holds codes into self.book_ids, the pairs of member code m are
+    self.book[self.starts[m]:self.starts[m] + self.counts[m]].
+    """
+    def __init__(self, using='default', chunk_size=50_000):
+        members, books = fetch_columns(
+            Borrow.objects.using(using).order_by(), ('member_id', 'book_id'), chunk_size=chunk_size
+        )
+        self.book_ids, books = np.unique(books, return_inverse=True)
+        members = np.unique(members, return_inverse=True)[1]
+        size = max(len(self.book_ids), 1)
+        self.member, self.book = np.divmod(np.unique(members * size + books), size)
+        self.counts = np.bincount(self.member)
+        self.starts = np.cumsum(self.counts) - self.counts
+        self.borrowers = np.bincount(self.book, minlength=len(self.book_ids))
+
+    def codes(self, book_ids):
+        """ Codes of the books of book_ids that were borrowed at all. """
+        book_ids = np.asarray(book_ids, dtype=np.int64)
+        codes = np.searchsorted(self.book_ids, book_ids)
+        found = codes < len(self.book_ids)
+        found[found] = self.book_ids[codes[found]] == book_ids[found]
+        return codes[found]
+
+    def affected_books(self, book_ids):
+        """ Ids of the books sharing a member with book_ids: their scores change with a new borrow. """
+        members = self.member[np.isin(self.book, self.codes(book_ids))]
+        return self.book_ids[np.unique(self.book[np.isin(self.member, members)])]
+
+    def neighbours(self, book_ids, top_k):
+        """ (book_id, neighbour_id, co_borrowers, score, rank) of the top_k neighbours of book_ids. """
+        rows = np.flatnonzero(np.isin(self.book, self.codes(book_ids)))
+        # every pair of a selected book is expanded into the books of the same member
+        members = self.member[rows]
+        lengths = self.counts[members]
+        first = np.repeat(self.starts[members] - (np.cumsum(lengths) - lengths), lengths)
+        neighbour = self.book[first + np.arange(lengths.sum())]
+        source = np.repeat(self.book[rows], lengths)
+        other = neighbour != source
+
+        size = len(self.book_ids)
+        keys, co_borrowers = np.unique(source[other] * size + neighbour[other], return_counts=True)
+        source, neighbour = np.divmod(keys, size)
+        score = co_borrowers / np.sqrt(self.borrowers[source] * self.borrowers[neighbour])
+
+        # per book: score desc, co-borrowers desc, neighbour id asc (codes follow the ids)
+        order = np.lexsort((neighbour, -co_borrowers, -score, source))
+        source, neighbour, co_borrowers, score = source[order], neighbour[order], co_borrowers[order], score[order]
+        group_starts = np.flatnonzero(np.r_[True, source[1:] != source[:-1]])
+        rank = np.arange(len(source)) - np.repeat(group_starts, np.diff(np.r_[group_starts, len(source)])) + 1
+        top = rank <= top_k
+        return list(zip(
+            self.book_ids[source[top]].tolist(),
+            self.book_ids[neighbour[top]].tolist(),
+            co_borrowers[top].tolist(),
+            score[top].tolist(),
+            rank[top].tolist(),
+        ))
+
+
+def _store(matrix, book_ids, top_k, using):
+    rows = matrix.neighbours(book_ids, top_k)
+    neighbours = BookNeighbour.objects.using(using)
+    with transaction.atomic(using=using):
+        neighbours.filter(book_id__in=book_ids).delete()
+        neighbours.bulk_create(
+            [
+                BookNeighbour(book_id=book_id, neighbour_id=neighbour_id, co_borrowers=co_borrowers,
+                              score=score, rank=rank)
+                for book_id, neighbour_id, co_borrowers, score, rank in rows
+            ],
+            batch_size=1000,
+        )
+    return len(rows)
+
+
+def refresh_book_neighbours(full=False, top_k=TOP_K, chunk_size=500, using='default'):
+    """ Recompute stored neighbours, only for books affected since the last run unless full.
+
+    Returns (books refreshed, neighbour rows stored). Borrows are found by
+    created_at since the previous run minus CHECKPOINT_OVERLAP, so a borrow
+    committed after a run with a smaller id or timestamp is still picked up.
+    Deleted or edited borrows are not tracked incrementally, a periodic full
+    run picks them up.
+    """
+    checkpoint, _ = JobCheckpoint.objects.using(using).get_or_create(name=CHECKPOINT)
+    started = timezone.now()
+    matrix = BorrowMatrix(using)
+
+    if full or checkpoint.processed_until is None:
+        book_ids = matrix.book_ids.tolist()
+        # books without any borrow left have no neighbours
+        BookNeighbour.objects.using(using).exclude(
+            book_id__in=Borrow.objects.using(using).values('book_id')
+        ).delete()
+    else:
+        new_books = Borrow.objects.using(using).filter(
+            created_at__gte=checkpoint.processed_until - CHECKPOINT_OVERLAP
+        ).order_by().values_list('book_id', flat=True).distinct()
+        book_ids = matrix.affected_books(list(new_books)).tolist()
+
+    stored = 0
+    for start in range(0, len(book_ids), chunk_size):
+        stored += _store(matrix, book_ids[start:start + chunk_size], top_k, using)
+
+    checkpoint.processed_until = started
+    checkpoint.save(update_fields=['processed_until', 'updated_at'])
+    return len(book_ids), stored
@@ -0,0 +1,129 @@
+""" Denormalized search documents for books, authors and libraries.
+
+One SearchDocument row per searchable object keeps its text with weights
+(title A, subtitle B, body C) and a precomputed tsvector, so a catalog search
+is a single indexed query over one table instead of one per model. Documents
+are refreshed by library.signals once the changing transaction commits,
+`manage.py rebuild_search_index` rebuilds them all.
+"""
+from functools import partial
+from threading import local
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramSimilarity
+from django.db import transaction
+from django.db.models import Count, F, Q
+from .models import Author, AuthorDetail, Book, Library, SearchDocument
+
+SEARCH_CONFIG = 'english'
+# objects per index_objects call of a flush
+BATCH_SIZE = 2000
+
+# ids waiting for the commit, per thread: {using: {kind: set of ids}}
+_pending = local()
+
+
+def _join(*parts):
+    return ' '.join(part for part in parts if part)
+
+
+def book_documents(ids, using):
+    books = Book.objects.using(using).filter(id__in=ids).select_related('author').only(
+        'id', 'title', 'description', 'Genre', 'author__first_name', 'author__last_name'
+    )
+    for book in books:
+        author = _join(book.author.first_name, book.author.last_name) if book.author else ''
+        yield book.id, book.title, author, _join(book.description, book.Genre)
+
+
+def author_documents(ids, using):
+    biographies = {}
+    for author_id, biography, city in AuthorDetail.objects.using(using).filter(author_id__in=ids).values_list(
+        'author_id', 'biography', 'city'
+    ):
+        biographies.setdefault(author_id, []).extend([biography, city])
+    for author in Author.objects.using(using).filter(id__in=ids).only('id', 'first_name', 'last_name'):
+        yield author.id, _join(author.first_name, author.last_name), '', _join(*biographies.get(author.id, []))
+
+
+def library_documents(ids, using):
+    for library in Library.objects.using(using).filter(id__in=ids).only('id', 'title', 'location'):
+        yield library.id, library.title, library.location or '', ''
+
+
+DOCUMENTS = {
+    SearchDocument.BOOK: book_documents,
+    SearchDocument.AUTHOR: author_documents,
+    SearchDocument.LIBRARY: library_documents,
+}
+
+
+def index_objects(kind, ids, using='default'):
+    """ Create, refresh or drop the documents of objects kind/ids. """
+    ids = list(ids)
+    if not ids:
+        return
+    documents = [
+        SearchDocument(kind=kind, object_id=object_id, title=title[:255], subtitle=subtitle[:255], body=body)
+        for object_id, title, subtitle, body in DOCUMENTS[kind](ids, using)
+    ]
+    found = [document.object_id for document in documents]
+    with transaction.atomic(using=using):
+        # objects gone (or soft-deleted authors) lose their document
+        SearchDocument.objects.using(using).filter(kind=kind, object_id__in=ids).exclude(object_id__in=found).delete()
+        SearchDocument.objects.using(using).bulk_create(
+            documents,
+            update_conflicts=True,
+            unique_fields=['kind', 'object_id'],
+            update_fields=['title', 'subtitle', 'body'],
+        )
+        SearchDocument.objects.using(using).filter(kind=kind, object_id__in=found).update(
+            search_vector=(
+                SearchVector('title', weight='A', config=SEARCH_CONFIG)
+                + SearchVector('subtitle', weight='B', config=SEARCH_CONFIG)
+                + SearchVector('body', weight='C', config=SEARCH_CONFIG)
+            )
+        )
+
+
+def remove_objects(kind, ids, using='default'):
+    SearchDocument.objects.using(using).filter(kind=kind, object_id__in=list(ids)).delete()
+
+
+def index_on_commit(kind, ids, using='default'):
+    """ index_objects(kind, ids) after the current transaction commits.
+
+    Ids collected during a transaction are indexed together, BATCH_SIZE at a
+    time, by the first flush. Ids left over from a rolled back transaction are
+    indexed with the next commit, index_objects only reconciles documents with
+    the tables so that is harmless.
+    """
+    pending = getattr(_pending, 'objects', None)
+    if pending is None:
+        pending = _pending.objects = {}
+    pending.setdefault(using, {}).setdefault(kind, set()).update(ids)
+    # a failing index must not fail the committed change, rebuild_search_index repairs it
+    transaction.on_commit(partial(_flush, using), using=using, robust=True)
+
+
+def _flush(using):
+    pending = getattr(_pending, 'objects', {}).pop(using, {})
+    for kind, ids in pending.items():
+        ids = sorted(ids)
+        for start in range(0, len(ids), BATCH_SIZE):
+            index_objects(kind, ids[start:start + BATCH_SIZE], using)
+
+
+def search(text, kind=None, limit=20):
+    """ Ranked documents matching text and the number of matches per kind (facets). """
+    query = SearchQuery(text, search_type='websearch', config=SEARCH_CONFIG)
+    # GIN tsvector index for words, GIN trigram index on title for typos
+    matches = SearchDocument.objects.filter(Q(search_vector=query) | Q(title__trigram_similar=text))
+
+    facets = {choice: 0 for choice, _ in SearchDocument.KIND_CHOICES}
+    facets.update(matches.order_by().values_list('kind').annotate(total=Count('id')))
+
+    if kind:
+        matches = matches.filter(kind=kind)
+    results = matches.only('kind', 'object_id', 'title', 'subtitle').annotate(
+        rank=SearchRank(F('search_vector'), query) + TrigramSimilarity('title', text)
+    ).order_by('-rank', 'kind', 'object_id')[:limit]
+    return results, facets
@@ -0,0 +1,152 @@
+from django.utils import timezone
+from rest_framework import serializers
+from .models import (
+    Author,
+    Book,
+    BookNeighbour,
+    Borrow,
+    Category,
+    Event,
+    EventParticipant,
+    Library,
+    Member,
+    Post,
+    SearchDocument,
+    )
+
+
+class CatalogAuthorSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Author
+        fields = ['id', 'first_name', 'last_name']
+
+
+class CatalogCategorySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Category
+        fields = ['id', 'name']
+
+
+class CatalogLibrarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Library
+        fields = ['id', 'title', 'location']
+
+
+class CatalogPublisherSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Member
+        fields = ['id', 'first_name', 'last_name']
+
+
+class BookCatalogSerializer(serializers.ModelSerializer):
+    """ Read-only book with its relations, rating comes from the stored counters. """
+    author = CatalogAuthorSerializer(read_only=True)
+    category = CatalogCategorySerializer(read_only=True)
+    publisher = CatalogPublisherSerializer(read_only=True)
+    libraries = CatalogLibrarySerializer(many=True, read_only=True)
+    genre = serializers.CharField(source='Genre', read_only=True)
+    rating = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = Book
+        fields = [
+            'id',
+            'title',
+            'author',
+            'publication_date',
+            'description',
+            'genre',
+            'amount_pages',
+            'publisher',
+            'category',
+            'libraries',
+            'rating',
+            'rating_count',
+            ]
+        read_only_fields = fields
+
+
+class BorrowSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Borrow
+        fields = ['id', 'member', 'book', 'library', 'book_take_date', 'book_return_date', 'is_returned', 'returned_at']
+        read_only_fields = fields
+
+
+class CheckoutSerializer(serializers.Serializer):
+    """ Book and library are plain ids: the inventory UPDATE is their existence check. """
+    member = serializers.PrimaryKeyRelatedField(queryset=Member.objects.filter(active=True))
+    book = serializers.IntegerField(min_value=1)
+    library = serializers.IntegerField(min_value=1)
+    book_return_date = serializers.DateField()
+
+    def validate_book_return_date(self, value):
+        if value < timezone.localdate():
+            raise serializers.ValidationError('Return date cannot be in the past.')
+        return value
+
+
+class BookNeighbourSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source='neighbour_id', read_only=True)
+    title = serializers.CharField(source='neighbour.title', read_only=True)
+
+    class Meta:
+        model = BookNeighbour
+        fields = ['id', 'title', 'score', 'co_borrowers']
+        read_only_fields = fields
+
+
+class EventSerializer(serializers.ModelSerializer):
+    """ Counts come from Event.participant_count, no aggregate per event. """
+    places_left = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Event
+        fields = ['id', 'name', 'description', 'timestamp', 'library', 'capacity', 'participant_count', 'places_left']
+        read_only_fields = fields
+
+    def get_places_left(self, obj):
+        if obj.capacity is None:
+            return None
+        return max(obj.capacity - obj.participant_count, 0)
+
+
+class EventRegistrationSerializer(serializers.Serializer):
+    member = serializers.PrimaryKeyRelatedField(queryset=Member.objects.all())
+
+
+class EventParticipantSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = EventParticipant
+        fields = ['id', 'event', 'member', 'register_date']
+        read_only_fields = fields
+
+
+class PostSerializer(serializers.ModelSerializer):
+    author = CatalogPublisherSerializer(read_only=True)
+
+    class Meta:
+        model = Post
+        fields = ['id', 'title', 'text', 'author', 'library', 'created_at']
+        read_only_fields = fields
+
+
+class PostClaimSerializer(serializers.Serializer):
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=20)
+
+
+class PostModerationSerializer(serializers.Serializer):
+    approve = serializers.ListField(child=serializers.IntegerField(min_value=1), max_length=100, default=list)
+    reject = serializers.ListField(child=serializers.IntegerField(min_value=1), max_length=100, default=list)
+
+
+class SearchResultSerializer(serializers.ModelSerializer):
+    type = serializers.CharField(source='kind', read_only=True)
+    id = serializers.IntegerField(source='object_id', read_only=True)
+    rank = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = SearchDocument
+        fields = ['type', 'id', 'title', 'subtitle', 'rank']
+        read_only_fields = fields
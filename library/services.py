@@ -0,0 +1,139 @@
+from datetime import timedelta
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from .models import Borrow, Event, EventParticipant, Inventory, Post
+
+
+class NotAvailable(Exception):
+    pass
+
+
+class EventFull(Exception):
+    pass
+
+
+class AlreadyRegistered(Exception):
+    pass
+
+
+# a claimed post returns to the queue when not moderated within this time
+CLAIM_TIMEOUT = timedelta(minutes=15)
+
+
+def checkout(member, book_id, library_id, book_return_date):
+    """ Take one available copy and create the Borrow, or raise NotAvailable.
+
+    The copy is taken with UPDATE ... SET available = available - 1 WHERE
+    available > 0: concurrent checkouts of the same book and library serialize
+    on that row, which stays locked until the transaction commits (the Borrow
+    INSERT is the only statement after it), and exactly one of them gets the
+    last copy.
+    """
+    with transaction.atomic():
+        taken = Inventory.objects.filter(
+            book_id=book_id,
+            library_id=library_id,
+            available__gt=0
+        ).update(available=F('available') - 1)
+        if not taken:
+            raise NotAvailable
+        return Borrow.objects.create(
+            member=member,
+            book_id=book_id,
+            library_id=library_id,
+            book_return_date=book_return_date,
+        )
+
+
+def return_borrow(borrow):
+    """ Mark the loan returned and give its copy back. False if it was already returned. """
+    with transaction.atomic():
+        returned_at = timezone.localdate()
+        returned = Borrow.objects.filter(pk=borrow.pk, is_returned=False).update(
+            is_returned=True,
+            returned_at=returned_at
+        )
+        if not returned:
+            return False
+        Inventory.objects.filter(
+            book_id=borrow.book_id,
+            library_id=borrow.library_id,
+            available__lt=F('copies')
+        ).update(available=F('available') + 1)
+    borrow.is_returned = True
+    borrow.returned_at = returned_at
+    return True
+
+
+def delete_borrow(borrow):
+    """ Delete the loan, its copy goes back to the shelf if it was not returned. """
+    with transaction.atomic():
+        return_borrow(borrow)
+        borrow.delete()
+
+
+def register(event, member):
+    """ Register member for event, raise AlreadyRegistered or EventFull.
+
+    The participant row is inserted first, so the event row is locked only
+    by the final conditional UPDATE until commit: participant_count + 1
+    WHERE capacity IS NULL OR participant_count < capacity.
+    """
+    try:
+        with transaction.atomic():
+            participant = EventParticipant.objects.create(event=event, member=member)
+            taken = Event.objects.filter(
+                Q(capacity__isnull=True) | Q(participant_count__lt=F('capacity')),
+                pk=event.pk
+            ).update(participant_count=F('participant_count') + 1)
+            if not taken:
+                raise EventFull
+    except IntegrityError:
+        # event_participant_unique
+        raise AlreadyRegistered
+    return participant
+
+
+def cancel(event, member):
+    """ Cancel the registration of member. False if there was none. """
+    with transaction.atomic():
+        deleted, _ = EventParticipant.objects.filter(event=event, member=member).delete()
+        if not deleted:
+            return False
+        Event.objects.filter(pk=event.pk, participant_count__gt=0).update(
+            participant_count=F('participant_count') - 1
+        )
+    return True
+
+
+def claim_posts(user, limit):
+    """ Claim up to limit pending posts for user, oldest first.
+
+    SELECT ... FOR UPDATE SKIP LOCKED lets concurrent moderators pass over the
+    rows another one is claiming right now instead of waiting for them, the
+    claim itself is persisted in claimed_by/claimed_at for CLAIM_TIMEOUT.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            Post.objects.claimable(now - CLAIM_TIMEOUT).order_by('created_at', 'id').select_for_update(
+                skip_locked=True
+            ).values_list('id', flat=True)[:limit]
+        )
+        Post.objects.filter(id__in=ids).update(claimed_by=user, claimed_at=now)
+    return Post.objects.filter(id__in=ids).order_by('created_at', 'id')
+
+
+def moderate_posts(user, approve, reject):
+    """ Approve or reject (delete) posts claimed by user. Returns the ids actually moderated. """
+    claimed = Post.objects.pending().filter(
+        claimed_by=user,
+        claimed_at__gte=timezone.now() - CLAIM_TIMEOUT
+    ).select_for_update()
+    with transaction.atomic():
+        approved = list(claimed.filter(id__in=approve).values_list('id', flat=True))
+        rejected = list(claimed.filter(id__in=reject).exclude(id__in=approved).values_list('id', flat=True))
+        Post.objects.filter(id__in=approved).update(moderated=True, claimed_by=None, claimed_at=None)
+        Post.objects.filter(id__in=rejected).delete()
+    return approved, rejected
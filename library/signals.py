@@ -0,0 +1,128 @@
+from functools import partial
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
+from first_project.soft_delete import post_soft_delete, post_restore
+from . import search
+from .models import Author, AuthorDetail, Book, Category, Inventory, Library, Member, Review, SearchDocument
+from .catalog import bump_book_catalog_version
+
+
+def _change_rating(book_id, rating_delta, count_delta, using):
+    if book_id is None:
+        return
+    Book.objects.using(using).filter(pk=book_id).update(
+        rating_sum=F('rating_sum') + rating_delta,
+        rating_count=F('rating_count') + count_delta,
+    )
+
+
+def review_saved(sender, instance, created, using, **kwargs):
+    """ Keep Book.rating_sum / rating_count in step with the reviews. """
+    loaded_book_id, loaded_rating = getattr(instance, '_loaded_rating', (None, None))
+    if created or loaded_book_id is None:
+        _change_rating(instance.book_id, instance.rating, 1, using)
+    elif loaded_book_id != instance.book_id:
+        _change_rating(loaded_book_id, -loaded_rating, -1, using)
+        _change_rating(instance.book_id, instance.rating, 1, using)
+    elif loaded_rating != instance.rating:
+        _change_rating(instance.book_id, instance.rating - loaded_rating, 0, using)
+    instance._loaded_rating = (instance.book_id, instance.rating)
+
+
+def review_deleted(sender, instance, using, **kwargs):
+    book_id, rating = getattr(instance, '_loaded_rating', (None, None))
+    if rating is None:
+        book_id, rating = instance.book_id, instance.rating
+    _change_rating(book_id, -rating, -1, using)
+
+post_save.connect(review_saved, sender=Review)
+post_delete.connect(review_deleted, sender=Review)
+
+
+def book_catalog_changed(sender, **kwargs):
+    """ Anything shown by the book catalog API invalidates its ETag. """
+    if kwargs.get('action', 'post_').startswith('post_'):
+        transaction.on_commit(bump_book_catalog_version, using=kwargs.get('using'))
+
+for model in (Book, Author, Category, Library, Member, Review):
+    post_save.connect(book_catalog_changed, sender=model)
+    post_delete.connect(book_catalog_changed, sender=model)
+post_soft_delete.connect(book_catalog_changed, sender=Author)
+post_restore.connect(book_catalog_changed, sender=Author)
+m2m_changed.connect(book_catalog_changed, sender=Book.libraries.through)
+
+
+def book_libraries_added(sender, instance, action, reverse, pk_set, using, **kwargs):
+    """ A book listed in a library gets an inventory row with one copy. """
+    if action != 'post_add' or not pk_set:
+        return
+    if reverse:
+        pairs = [(book_id, instance.pk) for book_id in pk_set]
+    else:
+        pairs = [(instance.pk, library_id) for library_id in pk_set]
+    Inventory.objects.using(using).bulk_create(
+        [Inventory(book_id=book_id, library_id=library_id) for book_id, library_id in pairs],
+        ignore_conflicts=True,
+    )
+
+m2m_changed.connect(book_libraries_added, sender=Book.libraries.through)
+
+
+def book_search_changed(sender, instance, using, **kwargs):
+    # a deleted book loses its document, index_objects drops documents of missing objects
+    search.index_on_commit(SearchDocument.BOOK, [instance.pk], using)
+
+
+def author_search_changed(sender, instance, using, **kwargs):
+    """ Author documents and, when the name changed, the documents of their books, which carry it. """
+    search.index_on_commit(SearchDocument.AUTHOR, [instance.pk], using)
+    book_ids = getattr(instance, '_search_book_ids', None)
+    if book_ids is None:
+        name = (instance.first_name, instance.last_name)
+        if kwargs.get('created') or getattr(instance, '_loaded_name', None) == name:
+            return
+        instance._loaded_name = name
+        book_ids = Book.objects.using(using).filter(author_id=instance.pk).values_list('id', flat=True)
+    search.index_on_commit(SearchDocument.BOOK, book_ids, using)
+
+
+def author_search_pre_delete(sender, instance, using, **kwargs):
+    # after the delete its books no longer point to the author
+    instance._search_book_ids = list(Book.objects.using(using).filter(author_id=instance.pk).values_list('id', flat=True))
+
+
+def authors_search_changed(sender, using, **kwargs):
+    """ Bulk soft delete / restore of authors.
+
+    The sent queryset no longer matches the changed rows, so author documents
+    are reconciled with the author table instead.
+    """
+    transaction.on_commit(partial(_reconcile_author_documents, using), using=using, robust=True)
+
+
+def _reconcile_author_documents(using):
+    documents = SearchDocument.objects.using(using).filter(kind=SearchDocument.AUTHOR)
+    documents.filter(object_id__in=Author.all_objects.using(using).filter(is_deleted=True).values('id')).delete()
+    missing = Author.objects.using(using).exclude(id__in=documents.values('object_id')).values_list('id', flat=True)
+    search.index_on_commit(SearchDocument.AUTHOR, missing, using)
+
+
+def author_detail_search_changed(sender, instance, using, **kwargs):
+    search.index_on_commit(SearchDocument.AUTHOR, [instance.author_id], using)
+
+
+def library_search_changed(sender, instance, using, **kwargs):
+    search.index_on_commit(SearchDocument.LIBRARY, [instance.pk], using)
+
+post_save.connect(book_search_changed, sender=Book)
+post_delete.connect(book_search_changed, sender=Book)
+post_save.connect(author_search_changed, sender=Author)
+pre_delete.connect(author_search_pre_delete, sender=Author)
+post_delete.connect(author_search_changed, sender=Author)
+post_soft_delete.connect(authors_search_changed, sender=Author)
+post_restore.connect(authors_search_changed, sender=Author)
+post_save.connect(author_detail_search_changed, sender=AuthorDetail)
+post_delete.connect(author_detail_search_changed, sender=AuthorDetail)
+post_save.connect(library_search_changed, sender=Library)
+post_delete.connect(library_search_changed, sender=Library)
@@ -1,3 +1,509 @@
-from django.test import TestCase
+import datetime
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from unittest import mock
+from django.contrib.admin.sites import site
+from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchQuery
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory, TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from first_project.paginations import encode_keyset_cursor
+from . import search
+from .analytics import REPORTS, Columns, _day, _days, fetch_columns
+from .models import (
+    Author, AuthorDetail, Book, BookNeighbour, Borrow, Category, Event, Inventory, JobCheckpoint, Library, Member,
+    Post, SearchDocument,
+)
+from .recommendations import CHECKPOINT, CHECKPOINT_OVERLAP, refresh_book_neighbours
+from .services import NotAvailable, checkout, delete_borrow, return_borrow
 
-# Create your tests here.
+
+def member(email, date_of_birth=datetime.date(1990, 1, 1), **fields):
+    return Member(
+        first_name='Ann', last_name='Lee', email=email, gender='F', date_of_birth=date_of_birth, role='B', **fields
+    )
+
+
+class MemberAgeTest(TestCase):
+    def test_clean_checks_age_range(self):
+        today = datetime.date.today()
+        member('ok@example.com').full_clean()
+        for date_of_birth in (today.replace(year=today.year - 3), datetime.date(1901, 1, 1)):
+            with self.assertRaises(ValidationError) as error:
+                member('bad@example.com', date_of_birth).full_clean()
+            self.assertIn('date_of_birth', error.exception.message_dict)
+
+    def test_aged_out_member_can_be_updated(self):
+        # the age range is not a CHECK, unrelated updates of old members keep working
+        old = member('old@example.com', datetime.date(1900, 6, 1))
+        old.save()
+        Member.objects.filter(pk=old.pk).update(active=False)
+        self.assertEqual(Member.objects.with_age().get(pk=old.pk).age, old.age)
+
+
+class ImportMembersTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.library = Library.objects.create(title='Central', location='Main st. 1')
+        member('taken@example.com').save()
+
+    def run_import(self, *rows, **options):
+        lines = ['first_name,last_name,email,gender,date_of_birth,role,libraries', *rows]
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as csv_file:
+            csv_file.write('\n'.join(lines) + '\n')
+        self.addCleanup(os.remove, csv_file.name)
+        stdout, stderr = StringIO(), StringIO()
+        call_command('import_members', csv_file.name, stdout=stdout, stderr=stderr, **options)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_import_reports_registered_emails(self):
+        stdout, stderr = self.run_import(
+            'Bob,Ray,taken@example.com,M,1980-05-05,B,',
+            f'Eve,Fox,new@example.com,F,1985-03-03,B,{self.library.id}',
+            'Kid,Fox,kid@example.com,F,2025-01-01,B,',
+        )
+        self.assertIn('Line 2: email "taken@example.com" is already registered.', stderr)
+        self.assertIn('Line 4: age must be between', stderr)
+        self.assertIn('1 members imported, 1 invalid rows skipped, 1 already registered skipped', stdout)
+        new = Member.objects.get(email='new@example.com')
+        self.assertEqual(list(new.libraries.all()), [self.library])
+
+    def test_skip_existing(self):
+        stdout, stderr = self.run_import('Bob,Ray,taken@example.com,M,1980-05-05,B,', skip_existing=True)
+        self.assertEqual(stderr, '')
+        self.assertIn('0 members imported, 0 invalid rows skipped, 1 already registered skipped', stdout)
+
+
+class CheckoutConcurrencyTest(TransactionTestCase):
+    """ Concurrent checkouts in real transactions, one connection per thread. """
+    COPIES = 3
+    THREADS = 20
+
+    def setUp(self):
+        self.library = Library.objects.create(title='Central')
+        self.book = Book.objects.create(title='Dune')
+        self.member = Member.objects.create(
+            first_name='Ann', last_name='Lee', email='ann@example.com', gender='F',
+            date_of_birth=datetime.date(1990, 1, 1), role='B',
+        )
+        Inventory.objects.create(book=self.book, library=self.library, copies=self.COPIES, available=self.COPIES)
+        self.due = datetime.date.today() + datetime.timedelta(days=14)
+
+    def test_last_copies(self):
+        barrier = threading.Barrier(self.THREADS)
+
+        def take():
+            try:
+                barrier.wait()
+                checkout(self.member, self.book.id, self.library.id, self.due)
+                return True
+            except NotAvailable:
+                return False
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(self.THREADS) as pool:
+            results = list(pool.map(lambda _: take(), range(self.THREADS)))
+
+        self.assertEqual(results.count(True), self.COPIES)
+        self.assertEqual(Borrow.objects.count(), self.COPIES)
+        self.assertEqual(Inventory.objects.get().available, 0)
+
+    def test_return_and_delete_give_the_copy_back(self):
+        first = checkout(self.member, self.book.id, self.library.id, self.due)
+        second = checkout(self.member, self.book.id, self.library.id, self.due)
+        self.assertEqual(Inventory.objects.get().available, self.COPIES - 2)
+        self.assertTrue(return_borrow(first))
+        self.assertFalse(return_borrow(first))
+        delete_borrow(second)
+        delete_borrow(first)
+        self.assertEqual(Inventory.objects.get().available, self.COPIES)
+
+
+class EventRegistrationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'password')
+        cls.library = Library.objects.create(title='Central')
+        cls.event = Event.objects.create(
+            name='Reading', description='Dune', library=cls.library, capacity=2,
+            timestamp=timezone.now() + datetime.timedelta(days=7),
+        )
+        cls.readers = []
+        for number in range(3):
+            reader = member(f'reader{number}@example.com')
+            reader.save()
+            cls.readers.append(reader)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('event-registration', args=[self.event.id])
+
+    def register(self, reader):
+        return self.client.post(self.url, {'member': reader.id})
+
+    def cancel(self, reader):
+        return self.client.delete(self.url, {'member': reader.id})
+
+    def participant_count(self):
+        count = Event.objects.get(pk=self.event.pk).participant_count
+        self.assertEqual(count, self.event.eventparticipant_set.count())
+        return count
+
+    def test_register_and_cancel(self):
+        first, second, third = self.readers
+        self.assertEqual(self.register(first).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.register(first).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.register(second).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.register(third).status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(self.participant_count(), 2)
+
+        self.assertEqual(self.cancel(first).status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self.cancel(first).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.participant_count(), 1)
+        self.assertEqual(self.register(third).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.participant_count(), 2)
+
+    def test_admin_rejects_capacity_below_participants(self):
+        self.register(self.readers[0])
+        self.register(self.readers[1])
+        request = RequestFactory().post('/')
+        request.user = self.user
+        event_admin = site._registry[Event]
+        event = Event.objects.get(pk=self.event.pk)
+        form_class = event_admin.get_form(request, event)
+        data = {
+            'name': event.name, 'description': event.description, 'library': self.library.pk,
+            'timestamp_0': event.timestamp.date().isoformat(), 'timestamp_1': '18:00:00',
+            'book': [Book.objects.create(title='Dune').pk],
+        }
+        form = form_class(instance=event, data={**data, 'capacity': 1})
+        self.assertFalse(form.is_valid())
+        self.assertIn('capacity', form.errors)
+
+        # the form instance was loaded before the last registration
+        form = form_class(instance=event, data={**data, 'capacity': 3})
+        Event.objects.filter(pk=event.pk).update(capacity=3)
+        self.assertEqual(self.register(self.readers[2]).status_code, status.HTTP_201_CREATED)
+        self.assertTrue(form.is_valid(), form.errors)
+        event_admin.save_model(request, form.save(commit=False), form, change=True)
+        self.assertEqual(self.participant_count(), 3)
+
+
+class AnalyticsBackendsTest(TestCase):
+    """ The sql and columnar implementation of every report return the same rows. """
+    @classmethod
+    def setUpTestData(cls):
+        libraries = [Library.objects.create(title=f'Library {number}') for number in range(3)]
+        books = [
+            Book.objects.create(title=f'Book {number}', Genre=genre)
+            for number, genre in enumerate(['Fiction', 'Fiction', 'Sci-Fy', None])
+        ]
+        reader = member('reader@example.com')
+        reader.save()
+        start = datetime.date(2025, 1, 1)
+        loans = []
+        for number in range(60):
+            taken = start + datetime.timedelta(days=number * 5)
+            returned = taken + datetime.timedelta(days=number % 23) if number % 4 else None
+            loans.append(Borrow(
+                member=reader, book=books[number % len(books)], library=libraries[number % len(libraries)],
+                book_return_date=taken + datetime.timedelta(days=14), is_returned=returned is not None,
+                returned_at=returned,
+            ))
+        Borrow.objects.bulk_create(loans)
+        # book_take_date is auto_now_add
+        for loan in loans:
+            Borrow.objects.filter(pk=loan.pk).update(book_take_date=loan.book_return_date - datetime.timedelta(days=14))
+
+    def test_same_results(self):
+        for date_from, date_to in (
+            (datetime.date(2025, 1, 1), datetime.date(2025, 12, 31)),
+            (datetime.date(2025, 3, 10), datetime.date(2025, 4, 20)),
+            (datetime.date(2020, 1, 1), datetime.date(2020, 12, 31)),
+        ):
+            for report, backends in REPORTS.items():
+                with self.subTest(report=report, date_from=date_from):
+                    sql = backends['sql'](date_from, date_to)
+                    self.assertEqual(backends['columnar'](date_from, date_to), sql)
+                    if date_from.year == 2025:
+                        self.assertTrue(sql)
+
+    def test_columns_are_streamed_in_chunks(self):
+        whole, chunked = Columns(Borrow.objects.all()), Columns(Borrow.objects.all(), chunk_size=7)
+        self.assertEqual(len(chunked), 60)
+        for name in ('library', 'genre', 'taken', 'due', 'returned', 'is_returned'):
+            self.assertTrue((getattr(whole, name) == getattr(chunked, name)).all(), name)
+        # dates converted in Python give the day numbers computed by PostgreSQL
+        loans = Borrow.objects.order_by('id')
+        converted, = fetch_columns(loans, ('returned_at',), chunk_size=7, convert={'returned_at': _days})
+        computed, = fetch_columns(loans.annotate(returned_day=_day('returned_at')), ('returned_day',))
+        self.assertEqual(converted.tolist(), computed.tolist())
+
+    def test_invalid_dates(self):
+        client = APIClient()
+        client.force_authenticate(get_user_model().objects.create_superuser('admin', 'admin@example.com', 'password'))
+        url = reverse('circulation-report', args=[next(iter(REPORTS))])
+        response = client.get(url, {'from': '2025-13-01', 'to': '2025-12-31'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class BookNeighboursTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.library = Library.objects.create(title='Central')
+        cls.books = [Book.objects.create(title=f'Book {number}') for number in range(5)]
+        cls.members = []
+        for number in range(4):
+            reader = member(f'reader{number}@example.com')
+            reader.save()
+            cls.members.append(reader)
+        # the second loan of book 0 by member 0 counts once
+        for reader, books in ((0, [0, 0, 1, 2]), (1, [0, 1]), (2, [1, 3])):
+            for book in books:
+                cls.borrow(cls.members[reader], cls.books[book])
+
+    @classmethod
+    def borrow(cls, reader, book):
+        return Borrow.objects.create(
+            member=reader, book=book, library=cls.library, book_return_date=datetime.date(2025, 1, 15)
+        )
+
+    def expected(self, top_k=10):
+        """ The cosine top_k of every book, computed from Python sets. """
+        borrowers = {}
+        for member_id, book_id in Borrow.objects.values_list('member_id', 'book_id'):
+            borrowers.setdefault(book_id, set()).add(member_id)
+        rows = set()
+        for book_id, members in borrowers.items():
+            scored = sorted(
+                (-len(members & others) / (len(members) * len(others)) ** 0.5, -len(members & others), other_id)
+                for other_id, others in borrowers.items() if other_id != book_id and members & others
+            )
+            rows.update(
+                (book_id, other_id, -co_borrowers, round(-score, 9), rank)
+                for rank, (score, co_borrowers, other_id) in enumerate(scored[:top_k], 1)
+            )
+        return rows
+
+    def stored(self):
+        return {
+            (book_id, neighbour_id, co_borrowers, round(score, 9), rank)
+            for book_id, neighbour_id, co_borrowers, score, rank in BookNeighbour.objects.values_list(
+                'book_id', 'neighbour_id', 'co_borrowers', 'score', 'rank'
+            )
+        }
+
+    def test_full_refresh(self):
+        self.assertEqual(refresh_book_neighbours(chunk_size=2), (4, 8))
+        self.assertEqual(self.stored(), self.expected())
+        self.assertEqual(
+            list(BookNeighbour.objects.filter(book=self.books[0]).values_list('neighbour_id', flat=True)),
+            [self.books[1].id, self.books[2].id],
+        )
+        refresh_book_neighbours(full=True, top_k=1)
+        self.assertEqual(self.stored(), self.expected(top_k=1))
+
+    def test_incremental_refresh_catches_late_commits(self):
+        Borrow.objects.update(created_at=timezone.now() - datetime.timedelta(days=1))
+        refresh_book_neighbours()
+        processed_until = JobCheckpoint.objects.get(name=CHECKPOINT).processed_until
+        # stamped before the last run, committed after it
+        late = self.borrow(self.members[3], self.books[3])
+        self.borrow(self.members[3], self.books[4])
+        Borrow.objects.filter(pk=late.pk).update(created_at=processed_until - CHECKPOINT_OVERLAP / 2)
+
+        # books 3 and 4, and book 1 which shares member 2 with book 3
+        self.assertEqual(refresh_book_neighbours()[0], 3)
+        self.assertEqual(self.stored(), self.expected())
+
+        # nothing new: the overlap only repeats the books of the last borrows
+        self.assertEqual(refresh_book_neighbours()[0], 3)
+        Borrow.objects.update(created_at=processed_until - CHECKPOINT_OVERLAP * 2)
+        self.assertEqual(refresh_book_neighbours()[0], 0)
+
+
+class AuthorSoftDeleteAdminTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'password')
+        cls.library = Library.objects.create(title='Central')
+        cls.author = Author.objects.create(first_name='Frank', last_name='Herbert')
+        cls.category = Category.objects.create(name='Novel')
+        cls.publisher = member('publisher@example.com')
+        cls.publisher.save()
+        cls.book = Book.objects.create(
+            title='Dune', author=cls.author, category=cls.category, publisher=cls.publisher,
+            publication_date=datetime.date(1965, 8, 1),
+        )
+        cls.book.libraries.add(cls.library)
+
+    def setUp(self):
+        self.request = RequestFactory().get('/')
+        self.request.user = self.user
+        self.author.delete()
+
+    def test_book_keeps_deleted_author(self):
+        book = Book.objects.get(pk=self.book.pk)
+        self.assertEqual(book.author, self.author)
+        form_class = site._registry[Book].get_form(self.request, book)
+        form = form_class(instance=book, data={
+            'title': 'Dune', 'author': self.author.pk, 'publication_date': '1965-08-01',
+            'libraries': [self.library.pk], 'Genre': 'Sci-Fy', 'category': self.category.pk,
+            'publisher': self.publisher.pk,
+        })
+        self.assertTrue(form.is_valid(), form.errors)
+
+    def test_admin_lists_and_restores_deleted_authors(self):
+        author_admin = site._registry[Author]
+        queryset = author_admin.get_queryset(self.request)
+        self.assertIn(self.author, queryset)
+        self.assertNotIn('delete_selected', author_admin.get_actions(self.request))
+        author_admin.message_user = lambda *args, **kwargs: None
+        author_admin.restore(self.request, queryset.filter(pk=self.author.pk))
+        self.assertTrue(Author.objects.filter(pk=self.author.pk).exists())
+        author_admin.mark_deleted(self.request, author_admin.get_queryset(self.request).filter(pk=self.author.pk))
+        # still in the table: soft delete
+        self.assertTrue(Author.all_objects.get(pk=self.author.pk).is_deleted)
+
+
+class LibraryPostFeedTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.library = Library.objects.create(title='Central')
+        author = member('author@example.com')
+        author.save()
+        created_at = timezone.now()
+        cls.posts = Post.objects.bulk_create([
+            Post(title=f'Post {number}', text='Text', author=author, library=cls.library, moderated=True,
+                 created_at=created_at)
+            for number in range(3)
+        ])
+
+    def feed(self, **params):
+        return APIClient().get(reverse('library-post-feed', args=[self.library.id]), params)
+
+    def test_pages(self):
+        response = self.feed(limit=2)
+        self.assertEqual([post['id'] for post in response.data['posts']], [self.posts[2].id, self.posts[1].id])
+        response = self.feed(limit=2, cursor=response.data['next_cursor'])
+        self.assertEqual([post['id'] for post in response.data['posts']], [self.posts[0].id])
+        self.assertIsNone(response.data['next_cursor'])
+
+    def test_invalid_cursor(self):
+        created_at = self.posts[0].created_at
+        for cursor in (
+            encode_keyset_cursor(created_at, 'x'),
+            encode_keyset_cursor(created_at, [1]),
+            encode_keyset_cursor('2025-13-01T00:00:00', 1),
+            encode_keyset_cursor('2025-02-30T10:00:00', 1),
+        ):
+            with self.subTest(cursor=cursor):
+                self.assertEqual(self.feed(cursor=cursor).status_code, status.HTTP_404_NOT_FOUND)
+
+
+class SearchDocumentSignalsTest(TestCase):
+    """ library.signals keep the search documents in step, after the commit. """
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author = Author.objects.create(first_name='Frank', last_name='Herbert')
+            self.books = [
+                Book.objects.create(title=title, author=self.author) for title in ('Dune', 'Dune Messiah')
+            ]
+
+    def document(self, kind, object_id):
+        return SearchDocument.objects.filter(kind=kind, object_id=object_id).first()
+
+    def test_documents_are_written_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            library = Library.objects.create(title='Central', location='Main st. 1')
+            self.assertIsNone(self.document(SearchDocument.LIBRARY, library.id))
+        self.assertEqual(self.document(SearchDocument.LIBRARY, library.id).subtitle, 'Main st. 1')
+        self.assertEqual(self.document(SearchDocument.BOOK, self.books[0].id).subtitle, 'Frank Herbert')
+        matches = SearchDocument.objects.filter(search_vector=SearchQuery('messiah', config=search.SEARCH_CONFIG))
+        self.assertEqual(list(matches.values_list('object_id', flat=True)), [self.books[1].id])
+
+    def test_author_rename_reindexes_books_in_one_batch(self):
+        author = Author.objects.get(pk=self.author.pk)
+        with mock.patch.object(search, 'index_objects', wraps=search.index_objects) as index_objects:
+            with self.captureOnCommitCallbacks(execute=True):
+                author.rating = 5
+                author.save()
+            # name unchanged: the book documents stay as they are
+            self.assertEqual([call.args[0] for call in index_objects.call_args_list], [SearchDocument.AUTHOR])
+            index_objects.reset_mock()
+
+            with self.captureOnCommitCallbacks(execute=True):
+                author.last_name = 'Herbert Jr.'
+                author.save()
+                AuthorDetail.objects.create(author=author, biography='Wrote Dune.', city='Tacoma')
+            # both changes of the author are indexed by the first flush
+            calls = sorted((call.args[0], sorted(call.args[1])) for call in index_objects.call_args_list)
+            self.assertEqual(calls, [
+                (SearchDocument.AUTHOR, [author.pk]),
+                (SearchDocument.BOOK, sorted(book.pk for book in self.books)),
+            ])
+        self.assertEqual(self.document(SearchDocument.BOOK, self.books[1].id).subtitle, 'Frank Herbert Jr.')
+        self.assertEqual(self.document(SearchDocument.AUTHOR, author.pk).body, 'Wrote Dune. Tacoma')
+
+    def test_deletes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author.delete()
+        self.assertIsNone(self.document(SearchDocument.AUTHOR, self.author.pk))
+        with self.captureOnCommitCallbacks(execute=True):
+            Author.objects.include_deleted().restore()
+        self.assertIsNotNone(self.document(SearchDocument.AUTHOR, self.author.pk))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author.hard_delete()
+            self.books[0].delete()
+        self.assertIsNone(self.document(SearchDocument.AUTHOR, self.author.pk))
+        self.assertIsNone(self.document(SearchDocument.BOOK, self.books[0].id))
+        self.assertEqual(self.document(SearchDocument.BOOK, self.books[1].id).subtitle, '')
+
+
+class CatalogSearchTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        with cls.captureOnCommitCallbacks(execute=True):
+            author = Author.objects.create(first_name='Frank', last_name='Herbert')
+            cls.book = Book.objects.create(title='Dune Messiah', author=author, description='Paul rules.')
+            cls.library = Library.objects.create(title='Dune Library')
+
+    def get(self, **params):
+        return APIClient().get(reverse('catalog-search'), params)
+
+    def test_invalid_params(self):
+        for params in ({'q': 'd'}, {'q': 'dune', 'type': 'member'}):
+            with self.subTest(params=params):
+                self.assertEqual(self.get(**params).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_ranked_results_and_facets(self):
+        # all words must match: 'Dune Library' is neither a word match nor similar enough (0.24 < 0.3)
+        response = self.get(q='dune messiah')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['facets'], {'book': 1, 'author': 0, 'library': 0})
+        self.assertEqual(response.data['results'][0]['id'], self.book.id)
+        self.assertEqual(response.data['results'][0]['subtitle'], 'Frank Herbert')
+
+        # the book document carries its author name
+        response = self.get(q='herbert')
+        self.assertEqual(response.data['facets'], {'book': 1, 'author': 1, 'library': 0})
+
+        response = self.get(q='dune', type='library')
+        self.assertEqual([result['id'] for result in response.data['results']], [self.library.id])
+        self.assertEqual(response.data['facets'], {'book': 1, 'author': 0, 'library': 1})
+
+    def test_typo_matches_by_trigram(self):
+        response = self.get(q='Dune Mesiah')
+        self.assertEqual([result['id'] for result in response.data['results']][:1], [self.book.id])
@@ -0,0 +1,33 @@
+from django.urls import path
+from .views import (
+    BookCatalogListView,
+    BookCatalogDetailView,
+    BookAlsoBorrowedView,
+    OverdueReportView,
+    CheckoutView,
+    ReturnView,
+    CirculationReportView,
+    EventListView,
+    EventRegistrationView,
+    PostClaimView,
+    PostModerationView,
+    LibraryPostFeedView,
+    CatalogSearchView,
+    )
+
+
+urlpatterns = [
+    path('search/', CatalogSearchView.as_view(), name='catalog-search'),
+    path('books/', BookCatalogListView.as_view(), name='book-catalog-list'),
+    path('books/<int:pk>/', BookCatalogDetailView.as_view(), name='book-catalog-detail'),
+    path('books/<int:pk>/also-borrowed/', BookAlsoBorrowedView.as_view(), name='book-also-borrowed'),
+    path('borrows/checkout/', CheckoutView.as_view(), name='borrows-checkout'),
+    path('borrows/<int:pk>/return/', ReturnView.as_view(), name='borrows-return'),
+    path('borrows/overdue/', OverdueReportView.as_view(), name='borrows-overdue-report'),
+    path('events/', EventListView.as_view(), name='event-list'),
+    path('events/<int:pk>/registration/', EventRegistrationView.as_view(), name='event-registration'),
+    path('libraries/<int:pk>/posts/', LibraryPostFeedView.as_view(), name='library-post-feed'),
+    path('posts/moderation/claim/', PostClaimView.as_view(), name='posts-moderation-claim'),
+    path('posts/moderation/', PostModerationView.as_view(), name='posts-moderation'),
+    path('analytics/<slug:report>/', CirculationReportView.as_view(), name='circulation-report'),
+    ]
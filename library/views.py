@@ -1,3 +1,397 @@
-from django.shortcuts import render
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Prefetch, Q
+from django.shortcuts import get_object_or_404
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from rest_framework import status
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework.generics import GenericAPIView, ListAPIView, RetrieveAPIView
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
+from rest_framework.response import Response
+from django_filters.rest_framework import DjangoFilterBackend
+from first_project.paginations import (
+    EventCursorPagination,
+    IdCursorPagination,
+    encode_keyset_cursor,
+    decode_datetime_cursor,
+    )
+from .analytics import REPORTS, get_report
+from .catalog import BOOK_CATALOG_MAX_AGE, get_book_catalog_version
+from .filters import BookCatalogFilter
+from .models import Book, BookNeighbour, Borrow, Event, EventParticipant, Library, Member, Post, SearchDocument
+from .permissions import CanModeratePosts
+from .search import search
+from .serializers import (
+    BookCatalogSerializer,
+    BookNeighbourSerializer,
+    BorrowSerializer,
+    CheckoutSerializer,
+    EventSerializer,
+    EventRegistrationSerializer,
+    EventParticipantSerializer,
+    PostSerializer,
+    PostClaimSerializer,
+    PostModerationSerializer,
+    SearchResultSerializer,
+    )
+from .services import (
+    AlreadyRegistered,
+    EventFull,
+    NotAvailable,
+    cancel,
+    checkout,
+    claim_posts,
+    moderate_posts,
+    register,
+    return_borrow,
+    )
 
-# Create your views here.
+
+class BookCatalogMixin:
+    """ Public read-only book catalog.
+
+    Every response is two queries (books with author/category/publisher joined,
+    libraries prefetched) and carries an ETag of the catalog version, so a
+    revalidation with If-None-Match is answered with 304 without touching the DB.
+    Books are read from the primary: a body read from a lagging replica would be
+    revalidated under the new version until the next change.
+    """
+    queryset = Book.objects.select_related('author', 'category', 'publisher').prefetch_related(
+        Prefetch('libraries', queryset=Library.objects.only('id', 'title', 'location').order_by('id'))
+    )
+    serializer_class = BookCatalogSerializer
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def get_queryset(self):
+        # related libraries follow the books to the primary
+        return super().get_queryset().using(DEFAULT_DB_ALIAS)
+
+    def get_etag(self, request):
+        return f'"book-catalog-{get_book_catalog_version()}-{request.accepted_renderer.format}"'
+
+    def get(self, request, *args, **kwargs):
+        etag = self.get_etag(request)
+        if request.headers.get('If-None-Match') == etag:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+        else:
+            response = super().get(request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK:
+                response['ETag'] = etag
+        patch_cache_control(response, public=True, max_age=BOOK_CATALOG_MAX_AGE)
+        patch_vary_headers(response, ['Accept'])
+        return response
+
+
+class BookCatalogListView(BookCatalogMixin, ListAPIView):
+    """ Books filtered by genre, category, library or author, keyset paginated by id. """
+    pagination_class = IdCursorPagination
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = BookCatalogFilter
+
+
+class BookCatalogDetailView(BookCatalogMixin, RetrieveAPIView):
+    pass
+
+
+class BookAlsoBorrowedView(ListAPIView):
+    """ "Members who borrowed this also borrowed": stored top-K neighbours, one query. """
+    serializer_class = BookNeighbourSerializer
+    authentication_classes = []
+    permission_classes = [AllowAny]
+    pagination_class = None
+
+    def get_queryset(self):
+        return BookNeighbour.objects.filter(book_id=self.kwargs['pk']).select_related(
+            'neighbour'
+        ).only('neighbour_id', 'neighbour__title', 'score', 'co_borrowers').order_by('rank')
+
+    def get(self, request, *args, **kwargs):
+        response = super().get(request, *args, **kwargs)
+        # neighbours only change when refresh_book_recommendations runs
+        patch_cache_control(response, public=True, max_age=BOOK_CATALOG_MAX_AGE)
+        return response
+
+
+class OverdueReportView(GenericAPIView):
+    """ Current overdue loans grouped by library and member.
+
+    Query params:
+        library: only this library id
+    """
+    queryset = Borrow.objects.all()
+    permission_classes = [IsAdminUser]
+    pagination_class = None
+
+    def get(self, request):
+        today = timezone.localdate()
+        # grouping runs on borrow_overdue_idx alone, names are fetched by id afterwards
+        rows = self.get_queryset().overdue_counts(today).order_by('library', 'member')
+        library_id = request.query_params.get('library')
+        if library_id:
+            if not library_id.isdigit():
+                return Response({'error': '"library" must be an id.'}, status=status.HTTP_400_BAD_REQUEST)
+            rows = rows.filter(library=library_id)
+        rows = list(rows)
+
+        libraries = Library.objects.only('id', 'title').in_bulk({row['library'] for row in rows})
+        members = Member.objects.only('id', 'first_name', 'last_name', 'email').in_bulk(
+            {row['member'] for row in rows}
+        )
+
+        report = {}
+        for row in rows:
+            library = libraries[row['library']]
+            member = members[row['member']]
+            group = report.setdefault(library.id, {
+                'library': {'id': library.id, 'title': library.title},
+                'overdue_count': 0,
+                'members': [],
+            })
+            group['overdue_count'] += row['overdue_count']
+            group['members'].append({
+                'id': member.id,
+                'first_name': member.first_name,
+                'last_name': member.last_name,
+                'email': member.email,
+                'overdue_count': row['overdue_count'],
+                'oldest_return_date': row['oldest_return_date'],
+            })
+
+        return Response({
+            'date': today,
+            'overdue_count': sum(group['overdue_count'] for group in report.values()),
+            'libraries': list(report.values()),
+        }, status=status.HTTP_200_OK)
+
+
+class CheckoutView(GenericAPIView):
+    """ Lend one available copy of a book in a library to a member. """
+    queryset = Borrow.objects.all()
+    serializer_class = CheckoutSerializer
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        try:
+            borrow = checkout(data['member'], data['book'], data['library'], data['book_return_date'])
+        except NotAvailable:
+            return Response(
+                {'error': 'No available copy of this book in this library.'},
+                status=status.HTTP_409_CONFLICT
+            )
+        return Response(BorrowSerializer(borrow).data, status=status.HTTP_201_CREATED)
+
+
+class ReturnView(GenericAPIView):
+    """ Return a borrowed copy to its library. """
+    queryset = Borrow.objects.all()
+    serializer_class = BorrowSerializer
+
+    def post(self, request, pk):
+        borrow = self.get_object()
+        if not return_borrow(borrow):
+            return Response({'error': 'Book is already returned.'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(self.get_serializer(borrow).data, status=status.HTTP_200_OK)
+
+
+class CirculationReportView(GenericAPIView):
+    """ Circulation analytics of loans taken in a period, see library.analytics.
+
+    Query params:
+        from, to: period (YYYY-MM-DD), at most max_range_days long
+    """
+    queryset = Borrow.objects.all()
+    permission_classes = [IsAdminUser]
+    pagination_class = None
+    max_range_days = 5 * 366
+
+    def get(self, request, report):
+        if report not in REPORTS:
+            return Response(
+                {'error': f'Unknown report, choose one of: {", ".join(sorted(REPORTS))}.'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        try:
+            date_from = parse_date(request.query_params.get('from') or '')
+            date_to = parse_date(request.query_params.get('to') or '')
+        except ValueError:
+            # well formatted but impossible, e.g. month 13
+            date_from = date_to = None
+        if not date_from or not date_to:
+            return Response(
+                {'error': '"from" and "to" dates (YYYY-MM-DD) are required.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if date_from > date_to or (date_to - date_from).days >= self.max_range_days:
+            return Response(
+                {'error': f'Date range must be ordered and at most {self.max_range_days} days.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response({
+            'report': report,
+            'from': date_from,
+            'to': date_to,
+            'rows': get_report(report, date_from, date_to),
+        }, status=status.HTTP_200_OK)
+
+
+class EventListView(ListAPIView):
+    """ Upcoming events with their participant counts.
+
+    Query params:
+        library: only events of this library id
+    """
+    serializer_class = EventSerializer
+    authentication_classes = []
+    permission_classes = [AllowAny]
+    pagination_class = EventCursorPagination
+
+    def get_queryset(self):
+        events = Event.objects.filter(timestamp__gte=timezone.now())
+        library_id = self.request.query_params.get('library')
+        if library_id and library_id.isdigit():
+            events = events.filter(library_id=library_id)
+        return events
+
+
+class EventRegistrationView(GenericAPIView):
+    """ POST registers a member for the event, DELETE cancels the registration. """
+    queryset = EventParticipant.objects.all()
+    serializer_class = EventRegistrationSerializer
+
+    def post(self, request, pk):
+        event = get_object_or_404(Event.objects.only('id', 'timestamp'), pk=pk)
+        if event.timestamp < timezone.now():
+            return Response({'error': 'Event has already taken place.'}, status=status.HTTP_400_BAD_REQUEST)
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        member = serializer.validated_data['member']
+        if not member.active:
+            return Response({'error': 'Member is not active.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            participant = register(event, member)
+        except AlreadyRegistered:
+            return Response({'error': 'Member is already registered.'}, status=status.HTTP_400_BAD_REQUEST)
+        except EventFull:
+            return Response({'error': 'Event is full.'}, status=status.HTTP_409_CONFLICT)
+        return Response(EventParticipantSerializer(participant).data, status=status.HTTP_201_CREATED)
+
+    def delete(self, request, pk):
+        event = get_object_or_404(Event.objects.only('id'), pk=pk)
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        if not cancel(event, serializer.validated_data['member']):
+            return Response({'error': 'Member is not registered.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class PostClaimView(GenericAPIView):
+    """ Claim the next pending posts for the requesting moderator. """
+    serializer_class = PostClaimSerializer
+    permission_classes = [IsAuthenticated, CanModeratePosts]
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        posts = claim_posts(request.user, serializer.validated_data['limit']).select_related('author')
+        return Response(PostSerializer(posts, many=True).data, status=status.HTTP_200_OK)
+
+
+class PostModerationView(GenericAPIView):
+    """ Approve or reject posts claimed by the requesting moderator. """
+    serializer_class = PostModerationSerializer
+    permission_classes = [IsAuthenticated, CanModeratePosts]
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        approved, rejected = moderate_posts(
+            request.user,
+            serializer.validated_data['approve'],
+            serializer.validated_data['reject']
+        )
+        return Response({'approved': approved, 'rejected': rejected}, status=status.HTTP_200_OK)
+
+
+class LibraryPostFeedView(GenericAPIView):
+    """ Moderated posts of a library, newest first.
+
+    Query params:
+        limit: posts per page
+        cursor: next_cursor of the previous page
+    """
+    serializer_class = PostSerializer
+    authentication_classes = []
+    permission_classes = [AllowAny]
+    pagination_class = None
+    default_limit = 20
+    max_limit = 100
+
+    def get(self, request, pk):
+        try:
+            limit = int(request.query_params.get('limit', self.default_limit))
+        except ValueError:
+            limit = self.default_limit
+        limit = min(max(limit, 1), self.max_limit)
+
+        # range scan on post_library_feed_idx from the cursor on
+        posts = Post.objects.filter(library_id=pk, moderated=True)
+        cursor = request.query_params.get('cursor')
+        if cursor:
+            created_at, post_id = decode_datetime_cursor(cursor)
+            posts = posts.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=post_id))
+        posts = list(posts.select_related('author').order_by('-created_at', '-id')[:limit + 1])
+
+        next_cursor = None
+        if len(posts) > limit:
+            posts = posts[:limit]
+            next_cursor = encode_keyset_cursor(posts[-1].created_at, posts[-1].id)
+        return Response({
+            'posts': self.get_serializer(posts, many=True).data,
+            'next_cursor': next_cursor,
+        }, status=status.HTTP_200_OK)
+
+
+class CatalogSearchView(GenericAPIView):
+    """ Ranked search over books, authors and libraries with per-type match counts.
+
+    Query params:
+        q: search text (web search syntax: "quoted phrase", -excluded, or)
+        type: only results of this type, facets still count all types
+        limit: number of results
+    """
+    serializer_class = SearchResultSerializer
+    authentication_classes = []
+    permission_classes = [AllowAny]
+    pagination_class = None
+    min_length = 2
+    default_limit = 20
+    max_limit = 50
+
+    def get(self, request):
+        text = (request.query_params.get('q') or '').strip()
+        if len(text) < self.min_length:
+            return Response(
+                {'error': f'"q" must be at least {self.min_length} characters.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        kind = request.query_params.get('type')
+        if kind and kind not in dict(SearchDocument.KIND_CHOICES):
+            return Response(
+                {'error': f'"type" must be one of: {", ".join(dict(SearchDocument.KIND_CHOICES))}.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            limit = int(request.query_params.get('limit', self.default_limit))
+        except ValueError:
+            limit = self.default_limit
+        limit = min(max(limit, 1), self.max_limit)
+
+        results, facets = search(text, kind=kind, limit=limit)
+        return Response({
+            'query': text,
+            'facets': facets,
+            'results': self.get_serializer(results, many=True).data,
+        }, status=status.HTTP_200_OK)
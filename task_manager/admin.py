@@ -1,64 +1,124 @@
 from django.contrib import admin
+from django.db.models import Count
+from django.urls import reverse
+from django.utils.html import format_html, format_html_join
+from first_project.admin_export import CsvExportMixin
+from first_project.paginations import EstimatedCountPaginator
+from task_manager.admin_filters import TaskIdFilter, CategoryNameFilter
+from task_manager.services import bulk_transition
 from task_manager.models import (
     Category,
     Task,
     SubTask,
+    STATUS_CHOICES,
 )
 
+SUBTASKS_PREVIEW = 10
+
 
 class SubTaskInline(admin.TabularInline):
+    """ Blank rows for new subtasks only, existing ones are in TaskAdmin.subtasks_summary. """
     model = SubTask
     extra = 1
     fields = ('title', 'description', 'status', 'deadline',)
     show_change_link = True
+    verbose_name_plural = 'New subtasks'
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).none()
 
 
 @admin.register(Task)
-class TaskAdmin(admin.ModelAdmin):
+class TaskAdmin(CsvExportMixin, admin.ModelAdmin):
     list_display = ('short_title', 'short_desc', 'status', 'created_at', 'deadline',)
-    search_fields = ('title',)
-    list_filter = ('deadline', 'status', 'category',)
-    fields = ('title', 'description', 'category', 'status', 'deadline',)
+    search_fields = ('title',)  # task_title_upper_trgm_idx
+    list_filter = ('deadline', 'status', CategoryNameFilter,)
+    fields = ('title', 'description', 'category', 'status', 'deadline', 'subtasks_summary',)
+    readonly_fields = ('subtasks_summary',)
     list_per_page = 10
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     inlines = [SubTaskInline]
     actions = ['mark_as_done', 'mark_as_in_progress']
+    csv_fields = ('id', 'title', 'description', 'status', 'deadline', 'created_at', 'updated_at', 'owner__username',)
 
     def short_desc(self, obj):
-        return obj.description[:40] + ('...' if len(obj.description) > 40 else '')
+        description = obj.description or ''
+        return description[:40] + ('...' if len(description) > 40 else '')
     short_desc.short_description = 'description'
 
     def short_title(self, obj):
         return obj.title[:10] + ('...' if len(obj.title) > 10 else '')
     short_title.short_description = 'Title'
 
+    @admin.display(description='Subtasks')
+    def subtasks_summary(self, obj):
+        """ Counts by status and latest subtasks, the rest via the filtered changelist. """
+        if not obj.pk:
+            return '-'
+        counts = dict(obj.subtasks.order_by().values_list('status').annotate(count=Count('id')))
+        latest = obj.subtasks.order_by('-created_at', '-id')[:SUBTASKS_PREVIEW]
+        changelist_url = reverse('admin:task_manager_subtask_changelist') + f'?task_id={obj.pk}'
+        return format_html(
+            '<p>{}</p><ul>{}</ul><p><a href="{}">All {} subtasks</a></p>',
+            ', '.join(f'{label}: {counts.get(code, 0)}' for code, label in STATUS_CHOICES.items()),
+            format_html_join(
+                '',
+                '<li><a href="{}">{}</a> ({})</li>',
+                (
+                    (reverse('admin:task_manager_subtask_change', args=[subtask.pk]), subtask.title, subtask.get_status_display())
+                    for subtask in latest
+                )
+            ),
+            changelist_url,
+            sum(counts.values()),
+        )
+
     @admin.action(description="Mark as Done")
     def mark_as_done(self, request, queryset):
-        updated = queryset.update(status='DONE')
+        updated = len(bulk_transition(queryset, 'DONE'))
         self.message_user(request, f"Marked {updated} item's as Done.")
 
     @admin.action(description="Mark as In Progress")
     def mark_as_in_progress(self, request, queryset):
-        updated = queryset.update(status='IN_PROGRESS')
+        updated = len(bulk_transition(queryset, 'IN_PROGRESS'))
         self.message_user(request, f"Marked {updated} item's as In Progress.")
 
 @admin.register(SubTask)
-class SubTaskAdmin(admin.ModelAdmin):
+class SubTaskAdmin(CsvExportMixin, admin.ModelAdmin):
     list_display = ('title','status', 'task', 'created_at', 'deadline',)
-    search_fields = ('title', 'task',)
-    list_filter = ('deadline', 'status', 'task',)
+    list_select_related = ('task',)
+    search_fields = ('title',)  # subtask_title_upper_trgm_idx
+    list_filter = ('deadline', 'status', TaskIdFilter,)
     fields = ('title', 'description', 'task', 'status', 'deadline',)
+    autocomplete_fields = ('task',)
     list_per_page = 10
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
     actions = ['mark_as_done', 'mark_as_in_progress']
+    csv_fields = (
+        'id', 'title', 'description', 'status', 'deadline', 'created_at', 'updated_at',
+        'task_id', 'task__title', 'owner__username',
+    )
+
+    def get_search_results(self, request, queryset, search_term):
+        # a task id: exact lookup on subtask_task_created_at_idx; OR-ing it with the
+        # title search would turn both into a sequential scan
+        try:
+            task_id = int(search_term)
+        except ValueError:
+            return super().get_search_results(request, queryset, search_term)
+        return queryset.filter(task_id=task_id), False
 
     @admin.action(description="Mark as Done")
     def mark_as_done(self, request, queryset):
-        updated = queryset.update(status='DONE')
+        updated = len(bulk_transition(queryset, 'DONE'))
         self.message_user(request, f"Marked {updated} item's as Done.")
 
     @admin.action(description="Mark as In Progress")
     def mark_as_in_progress(self, request, queryset):
-        updated = queryset.update(status='IN_PROGRESS')
+        updated = len(bulk_transition(queryset, 'IN_PROGRESS'))
         self.message_user(request, f"Marked {updated} item's as In Progress.")
 
 
@@ -0,0 +1,50 @@
+from django.contrib import admin
+from .catalog import get_category_catalog
+
+
+class InputFilter(admin.SimpleListFilter):
+    """ Sidebar filter with a text input instead of a list of every related object. """
+    template = 'admin/input_filter.html'
+    placeholder = ''
+
+    def lookups(self, request, model_admin):
+        # must not be empty, otherwise the filter is not rendered
+        return ((None, ''),)
+
+    def choices(self, changelist):
+        all_choice = next(super().choices(changelist))
+        all_choice['query_parts'] = [
+            (name, value)
+            for name, value in changelist.params.items()
+            if name != self.parameter_name
+        ]
+        yield all_choice
+
+
+class TaskIdFilter(InputFilter):
+    title = 'task id'
+    parameter_name = 'task_id'
+    placeholder = 'Task id'
+
+    def queryset(self, request, queryset):
+        value = (self.value() or '').strip()
+        if value.isdigit():
+            return queryset.filter(task_id=int(value))
+        return queryset
+
+
+class CategoryNameFilter(InputFilter):
+    """ Category ids are resolved from the cached catalog, no join to categories. """
+    title = 'category'
+    parameter_name = 'category_name'
+    placeholder = 'Category name'
+
+    def queryset(self, request, queryset):
+        value = (self.value() or '').strip().lower()
+        if not value:
+            return queryset
+        ids = [
+            category.id for category in get_category_catalog().by_id.values()
+            if category.name.lower() == value
+        ]
+        return queryset.filter(category__id__in=ids)
@@ -0,0 +1,68 @@
+""" In-process snapshot of active categories, invalidated by a global version number.
+
+The version lives in the shared cache (settings.CACHES), so every app instance
+reloads its snapshot after a category change in any of them. Category statistics
+are cached in the same way under their own version. Both are always loaded from
+the primary: a snapshot read from a lagging replica would be kept for the whole
+new version.
+"""
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from first_project.cache_version import get_version, bump_version
+from .models import Category
+
+CATALOG_VERSION_KEY = 'task_manager:category_catalog_version'
+STATISTIC_VERSION_KEY = 'task_manager:category_statistic_version'
+STATISTIC_TIMEOUT = 60 * 60
+
+_snapshot = None
+
+
+class CategoryCatalog:
+    """ Snapshot of non-deleted categories for one catalog version. """
+    def __init__(self, version, categories):
+        from .serializers import CategoryListSerializer
+
+        self.version = version
+        self.etag = f'"category-catalog-{version}"'
+        self.by_id = {category.id: category for category in categories}
+        self.data = CategoryListSerializer(self.by_id.values(), many=True).data
+
+
+def get_catalog_version():
+    """ Current global catalog version. """
+    return get_version(CATALOG_VERSION_KEY)
+
+
+def bump_catalog_version():
+    """ Invalidate catalog snapshots of all app instances. """
+    bump_version(CATALOG_VERSION_KEY)
+
+
+def bump_statistic_version():
+    """ Invalidate cached category statistics. """
+    bump_version(STATISTIC_VERSION_KEY)
+
+
+def get_category_statistic(include_deleted, compute):
+    """ Cached category statistics, compute() runs only on a cache miss.
+
+    compute() must read from the primary (DEFAULT_DB_ALIAS).
+    """
+    key = f'task_manager:category_statistic:{get_version(STATISTIC_VERSION_KEY)}:{int(include_deleted)}'
+    data = cache.get(key)
+    if data is None:
+        data = compute()
+        cache.set(key, data, timeout=STATISTIC_TIMEOUT)
+    return data
+
+
+def get_category_catalog():
+    """ Active categories, loaded from the DB only when the version has changed. """
+    global _snapshot
+    version = get_catalog_version()
+    snapshot = _snapshot
+    if snapshot is None or snapshot.version != version:
+        snapshot = CategoryCatalog(version, Category.objects.using(DEFAULT_DB_ALIAS).order_by('id'))
+        _snapshot = snapshot
+    return snapshot
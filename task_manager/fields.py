@@ -0,0 +1,49 @@
+from django.core.exceptions import ValidationError
+from django.db import models
+from django.utils.functional import cached_property
+
+
+class CodeChoiceField(models.SmallIntegerField):
+    """ Stores string choice codes as small integers.
+
+    Python side (models, forms, serializers, filters) keeps working with the
+    string codes from `choices`, the database only sees the integer from `codes`.
+    """
+    description = "Choice code stored as small integer"
+
+    def __init__(self, *args, codes=None, **kwargs):
+        self.codes = dict(codes or {})
+        self.codes_by_value = {value: code for code, value in self.codes.items()}
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs['codes'] = self.codes
+        return name, path, args, kwargs
+
+    @cached_property
+    def validators(self):
+        # integer range validators make no sense for string codes
+        return [*self.default_validators, *self._validators]
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return self.codes_by_value.get(value, value)
+
+    def to_python(self, value):
+        if value is None or value in self.codes:
+            return value
+        try:
+            return self.codes_by_value[int(value)]
+        except (KeyError, TypeError, ValueError):
+            raise ValidationError(
+                self.error_messages['invalid_choice'],
+                code='invalid_choice',
+                params={'value': value},
+            )
+
+    def get_prep_value(self, value):
+        if isinstance(value, str) and value in self.codes:
+            return self.codes[value]
+        return super().get_prep_value(value)
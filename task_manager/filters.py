@@ -1,4 +1,7 @@
+from zoneinfo import ZoneInfo
 import django_filters
+from django.conf import settings
+from django.db.models.functions import ExtractWeekDay
 from .models import Task
 
 class TaskFilter(django_filters.FilterSet):
@@ -14,9 +17,14 @@ class TaskFilter(django_filters.FilterSet):
                 return queryset
         except (TypeError, ValueError):
             return queryset
-        
-        return queryset.filter(**{f'{name}__week_day': day_number})
+
+        # Pinned to settings.TIME_ZONE so the expression always matches
+        # task_deadline_weekday_idx, whatever timezone is active for the request.
+        weekday = ExtractWeekDay(name, tzinfo=ZoneInfo(settings.TIME_ZONE))
+        return queryset.alias(**{f'{name}_weekday': weekday}).filter(
+            **{f'{name}_weekday': day_number}
+        )
 
     class Meta:
         model = Task
-        fields = ['status']
\ No newline at end of file
+        fields = ['status']
@@ -0,0 +1,35 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from task_manager.models import Category
+
+
+class Command(BaseCommand):
+    help = 'Hard delete categories soft-deleted longer than the retention period, in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30, help='Retention period in days.')
+        parser.add_argument('--batch-size', type=int, default=500, help='Categories per batch.')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Task links deleted per transaction.')
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be deleted.')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        expired = Category.objects.only_deleted().filter(deleted_at__lt=cutoff).order_by('id')
+
+        if options['dry_run']:
+            self.stdout.write(f'{expired.count()} categories deleted before {cutoff:%Y-%m-%d %H:%M} would be purged.')
+            return
+
+        total = 0
+        while True:
+            batch = list(expired.values_list('id', flat=True)[:options['batch_size']])
+            if not batch:
+                break
+            deleted = Category.objects.hard_delete_batch(batch, chunk_size=options['chunk_size'])
+            if not deleted:
+                break
+            total += deleted
+            self.stdout.write(f'Purged {deleted} categories ({total} total).')
+
+        self.stdout.write(self.style.SUCCESS(f'Done, {total} categories purged.'))
@@ -1,14 +1,28 @@
-from django.db import models
+from django.db import transaction
+from first_project.soft_delete import SoftDeleteManager
 
-class CategorySoftDeleteManager(models.Manager):
+class CategorySoftDeleteManager(SoftDeleteManager):
     """ Exclude soft-deleted objects by default. """
-    def get_queryset(self):
-        return super().get_queryset().filter(is_deleted=False)
 
-    def include_deleted(self):
-        """ Include soft-deleted objects. """
-        return super().get_queryset()
+    def hard_delete_batch(self, ids, chunk_size=5000):
+        """ Permanently delete soft-deleted objects with given ids.
 
-    def only_deleted(self):
-        """ Only soft-deleted objects. """
-        return super().get_queryset().filter(is_deleted=True)
\ No newline at end of file
+        Task links are removed first in chunks of chunk_size rows, each in its
+        own short transaction, so no statement holds long locks on the through
+        table. Returns the number of deleted objects.
+        """
+        ids = list(self.only_deleted().filter(id__in=ids).values_list('id', flat=True))
+        if not ids:
+            return 0
+        through = self.model.tasks.through
+        while True:
+            with transaction.atomic():
+                link_ids = list(
+                    through.objects.filter(category_id__in=ids).values_list('id', flat=True)[:chunk_size]
+                )
+                if not link_ids:
+                    break
+                through.objects.filter(id__in=link_ids).delete()
+        with transaction.atomic():
+            deleted, _ = self.only_deleted().filter(id__in=ids).hard_delete()
+        return deleted
@@ -0,0 +1,58 @@
+# Status moves from varchar codes to smallint (see task_manager.fields.CodeChoiceField).
+# Step 1 of 2: add nullable smallint column and backfill it in short batches,
+# without rewriting the table or holding long locks.
+
+from django.db import migrations, models, transaction
+from django.db.models import Case, Max, Value, When
+
+STATUS_CODES = {
+    "NEW": 1,
+    "IN_PROGRESS": 2,
+    "PENDING": 3,
+    "BLOCKED": 4,
+    "DONE": 5,
+}
+BATCH_SIZE = 10_000
+
+
+def status_code_expression():
+    return Case(
+        *[When(status=code, then=Value(value)) for code, value in STATUS_CODES.items()],
+        output_field=models.SmallIntegerField(),
+    )
+
+
+def backfill_status_code(apps, schema_editor):
+    db_alias = schema_editor.connection.alias
+    for model_name in ("Task", "SubTask"):
+        model = apps.get_model("task_manager", model_name)
+        max_id = model.objects.using(db_alias).aggregate(max_id=Max("id"))["max_id"] or 0
+        for start in range(0, max_id + 1, BATCH_SIZE):
+            with transaction.atomic(using=db_alias):
+                model.objects.using(db_alias).filter(
+                    id__gte=start,
+                    id__lt=start + BATCH_SIZE,
+                    status_code__isnull=True,
+                ).update(status_code=status_code_expression())
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("task_manager", "0008_alter_category_options"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="task",
+            name="status_code",
+            field=models.SmallIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name="subtask",
+            name="status_code",
+            field=models.SmallIntegerField(null=True),
+        ),
+        migrations.RunPython(backfill_status_code, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,98 @@
+# Step 2 of 2: catch up rows written since the backfill and swap the columns.
+
+from django.db import migrations, models
+from django.db.models import Case, F, Q, Value, When
+import task_manager.fields
+
+STATUS_CODES = {
+    "NEW": 1,
+    "IN_PROGRESS": 2,
+    "PENDING": 3,
+    "BLOCKED": 4,
+    "DONE": 5,
+}
+STATUS_CHOICES = [
+    ("NEW", "New"),
+    ("IN_PROGRESS", "In progress"),
+    ("PENDING", "Pending"),
+    ("BLOCKED", "Blocked"),
+    ("DONE", "Done"),
+]
+
+
+def catch_up_status_code(apps, schema_editor):
+    connection = schema_editor.connection
+    for model_name in ("Task", "SubTask"):
+        model = apps.get_model("task_manager", model_name)
+        if connection.vendor == "postgresql":
+            # block writers until the columns are swapped, the remaining set is tiny
+            schema_editor.execute(
+                f"LOCK TABLE {model._meta.db_table} IN SHARE ROW EXCLUSIVE MODE"
+            )
+        status_code = Case(
+            *[When(status=code, then=Value(value)) for code, value in STATUS_CODES.items()],
+            output_field=models.SmallIntegerField(),
+        )
+        # rows inserted since the backfill, and rows whose status changed since then
+        model.objects.using(connection.alias).alias(expected_code=status_code).filter(
+            Q(status_code__isnull=True) | ~Q(status_code=F("expected_code"))
+        ).update(status_code=status_code)
+
+
+def restore_status(apps, schema_editor):
+    for model_name in ("Task", "SubTask"):
+        model = apps.get_model("task_manager", model_name)
+        model.objects.using(schema_editor.connection.alias).update(
+            status=Case(
+                *[When(status_code=value, then=Value(code)) for code, value in STATUS_CODES.items()],
+                default=F("status"),
+            )
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("task_manager", "0009_task_status_code_subtask_status_code"),
+    ]
+
+    operations = [
+        migrations.RunPython(catch_up_status_code, restore_status),
+        migrations.RemoveField(
+            model_name="task",
+            name="status",
+        ),
+        migrations.RemoveField(
+            model_name="subtask",
+            name="status",
+        ),
+        migrations.RenameField(
+            model_name="task",
+            old_name="status_code",
+            new_name="status",
+        ),
+        migrations.RenameField(
+            model_name="subtask",
+            old_name="status_code",
+            new_name="status",
+        ),
+        migrations.AlterField(
+            model_name="task",
+            name="status",
+            field=task_manager.fields.CodeChoiceField(
+                choices=STATUS_CHOICES,
+                codes=STATUS_CODES,
+                default="NEW",
+                verbose_name="Status",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="subtask",
+            name="status",
+            field=task_manager.fields.CodeChoiceField(
+                choices=STATUS_CHOICES,
+                codes=STATUS_CODES,
+                default="NEW",
+                verbose_name="Status",
+            ),
+        ),
+    ]
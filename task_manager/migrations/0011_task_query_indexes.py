@@ -0,0 +1,48 @@
+# Generated by Django 5.2.1 on 2026-10-19 14:01
+
+import django.db.models.functions.datetime
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("task_manager", "0010_alter_task_status_alter_subtask_status"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="task",
+            index=models.Index(
+                fields=["owner", "created_at"], name="task_owner_created_at_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="task",
+            index=models.Index(
+                fields=["status", "created_at"], name="task_status_created_at_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="task",
+            index=models.Index(
+                condition=models.Q(
+                    ("deadline__isnull", False),
+                    models.Q(("status", "DONE"), _negated=True),
+                ),
+                fields=["deadline"],
+                name="task_open_deadline_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="task",
+            index=models.Index(
+                django.db.models.functions.datetime.ExtractWeekDay("deadline"),
+                name="task_deadline_weekday_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.1 on 2026-10-19 14:05
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("task_manager", "0012_task_deadline_idx"),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name="category",
+            constraint=models.UniqueConstraint(
+                django.db.models.functions.text.Lower("name"),
+                condition=models.Q(("is_deleted", False)),
+                name="category_name_ci_unique",
+                violation_error_message="Category name must be unique.",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="category",
+            name="name",
+            field=models.CharField(max_length=30, verbose_name="Category Title"),
+        ),
+    ]
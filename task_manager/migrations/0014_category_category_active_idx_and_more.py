@@ -0,0 +1,31 @@
+# Generated by Django 5.2.1 on 2026-10-19 14:07
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("task_manager", "0013_category_name_ci_unique"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="category",
+            index=models.Index(
+                condition=models.Q(("is_deleted", False)),
+                fields=["id"],
+                name="category_active_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="category",
+            index=models.Index(
+                condition=models.Q(("is_deleted", True)),
+                fields=["deleted_at"],
+                name="category_deleted_at_idx",
+            ),
+        ),
+    ]
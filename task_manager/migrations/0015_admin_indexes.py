@@ -0,0 +1,56 @@
+# Generated by Django 5.2.1 on 2026-10-19 14:08
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently, TrigramExtension
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("task_manager", "0014_category_category_active_idx_and_more"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        AddIndexConcurrently(
+            model_name="subtask",
+            index=models.Index(
+                fields=["created_at", "id"], name="subtask_created_at_id_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="subtask",
+            index=models.Index(
+                fields=["task", "created_at"], name="subtask_task_created_at_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="subtask",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("title"), name="gin_trgm_ops"
+                ),
+                name="subtask_title_upper_trgm_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="task",
+            index=models.Index(
+                fields=["created_at", "id"], name="task_created_at_id_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="task",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("title"), name="gin_trgm_ops"
+                ),
+                name="task_title_upper_trgm_idx",
+            ),
+        ),
+    ]
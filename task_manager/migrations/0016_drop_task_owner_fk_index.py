@@ -0,0 +1,41 @@
+# Generated by Django 5.2.1 on 2026-10-19 14:38
+# The FK index on owner_id is a prefix of task_owner_created_at_idx. Only the
+# index is dropped, without the constraint rebuild AlterField would run.
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("task_manager", "0015_admin_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name="task",
+                    name="owner",
+                    field=models.ForeignKey(
+                        db_index=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="tasks",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            database_operations=[
+                migrations.RunSQL(
+                    'DROP INDEX CONCURRENTLY IF EXISTS "task_manager_task_owner_id_848c5118"',
+                    'CREATE INDEX CONCURRENTLY IF NOT EXISTS "task_manager_task_owner_id_848c5118" '
+                    'ON "task_manager_task" ("owner_id")',
+                ),
+            ],
+        ),
+    ]
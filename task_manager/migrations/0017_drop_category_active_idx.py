@@ -0,0 +1,20 @@
+# Generated by Django 5.2.1 on 2026-10-19 14:43
+# (id) WHERE NOT is_deleted duplicated the primary key index.
+
+from django.contrib.postgres.operations import RemoveIndexConcurrently
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("task_manager", "0016_drop_task_owner_fk_index"),
+    ]
+
+    operations = [
+        RemoveIndexConcurrently(
+            model_name="category",
+            name="category_active_idx",
+        ),
+    ]
@@ -1,7 +1,10 @@
 from django.db import models
-from django.contrib.postgres.indexes import BrinIndex
+from django.db.models import Q
+from django.db.models.functions import ExtractWeekDay, Lower, Upper
+from django.contrib.postgres.indexes import BrinIndex, GinIndex, OpClass
+from first_project.soft_delete import SoftDeleteModel
 from .managers import CategorySoftDeleteManager
-from django.utils import timezone
+from .fields import CodeChoiceField
 from django.conf import settings
 
 # CONSTANTS
@@ -13,32 +16,23 @@ STATUS_CHOICES = {
     'DONE': 'Done'
 }
 
+# Stored values of STATUS_CHOICES codes. Never renumber existing codes.
+STATUS_CODES = {
+    'NEW': 1,
+    'IN_PROGRESS': 2,
+    'PENDING': 3,
+    'BLOCKED': 4,
+    'DONE': 5
+}
+
 
 # MODELS
-class Category(models.Model):
+class Category(SoftDeleteModel):
     ''' Task category model. '''
-    name = models.CharField(max_length=30, verbose_name="Category Title", unique=True)
-    is_deleted = models.BooleanField(verbose_name="Is Deleted", default=False)
-    deleted_at = models.DateTimeField(verbose_name="Deleted At", null=True, default=None)
+    name = models.CharField(max_length=30, verbose_name="Category Title")
     objects = CategorySoftDeleteManager()
     all_objects = models.Manager()
 
-    def delete(self):
-        """ Soft delete. """
-        self.is_deleted = True
-        self.deleted_at = timezone.now()
-        self.save()
-
-    def restore(self):
-        """ Restore a soft-deleted. """
-        self.is_deleted = False
-        self.deleted_at = None
-        self.save()
-
-    def hard_delete(self):
-        """ Hard delete. """
-        super().delete()
-
     def __str__(self):
         return f'{self.name}'
     
@@ -52,6 +46,19 @@ class Category(models.Model):
         permissions = [
             ("can_get_statistic", "Can get genres statistic"),
             ]
+        constraints = [
+            # case-insensitive, names of soft-deleted categories can be reused
+            models.UniqueConstraint(
+                Lower('name'),
+                condition=Q(is_deleted=False),
+                name='category_name_ci_unique',
+                violation_error_message='Category name must be unique.'
+            ),
+        ]
+        indexes = [
+            # only_deleted() and the purge job: is_deleted = true AND deleted_at < ?
+            models.Index(fields=['deleted_at'], condition=Q(is_deleted=True), name='category_deleted_at_idx'),
+        ]
 
 
 class Task(models.Model):
@@ -63,10 +70,12 @@ class Task(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.PROTECT,
         null=True,
-        related_name='tasks'
+        related_name='tasks',
+        # task_owner_created_at_idx has owner_id as its first column
+        db_index=False
     )
-    status = models.CharField(
-        max_length=15,
+    status = CodeChoiceField(
+        codes=STATUS_CODES,
         blank=False,
         choices=STATUS_CHOICES,
         default='NEW',
@@ -83,7 +92,25 @@ class Task(models.Model):
         db_table = 'task_manager_task'
         ordering = ['-created_at']
         verbose_name = 'Task'
-        indexes = [BrinIndex(fields=['created_at'], name='task_created_at_brin')]
+        indexes = [
+            BrinIndex(fields=['created_at'], name='task_created_at_brin'),
+            # default ordering (-created_at, -id), scanned backwards
+            models.Index(fields=['created_at', 'id'], name='task_created_at_id_idx'),
+            # title__icontains is UPPER(title) LIKE UPPER('%...%')
+            GinIndex(OpClass(Upper('title'), name='gin_trgm_ops'), name='task_title_upper_trgm_idx'),
+            models.Index(fields=['owner', 'created_at'], name='task_owner_created_at_idx'),
+            models.Index(fields=['status', 'created_at'], name='task_status_created_at_idx'),
+            # calendar ranges over deadline
+            models.Index(fields=['deadline'], name='task_deadline_idx'),
+            # overdue lookups: deadline < now() AND status <> 'DONE'
+            models.Index(
+                fields=['deadline'],
+                condition=Q(deadline__isnull=False) & ~Q(status='DONE'),
+                name='task_open_deadline_idx'
+            ),
+            # deadline__week_day, compiled in the project TIME_ZONE on migrate
+            models.Index(ExtractWeekDay('deadline'), name='task_deadline_weekday_idx'),
+        ]
 
 
 class SubTask(models.Model):
@@ -101,8 +128,8 @@ class SubTask(models.Model):
         null=True,
         related_name='subtasks'
     )
-    status = models.CharField(
-        max_length=15,
+    status = CodeChoiceField(
+        codes=STATUS_CODES,
         blank=False,
         choices=STATUS_CHOICES,
         default='NEW',
@@ -119,4 +146,9 @@ class SubTask(models.Model):
         db_table = 'task_manager_subtask'
         ordering = ['-created_at']
         verbose_name = 'SubTask'
-        indexes = [BrinIndex(fields=['created_at'], name='subtask_created_at_brin')]
\ No newline at end of file
+        indexes = [
+            BrinIndex(fields=['created_at'], name='subtask_created_at_brin'),
+            models.Index(fields=['created_at', 'id'], name='subtask_created_at_id_idx'),
+            models.Index(fields=['task', 'created_at'], name='subtask_task_created_at_idx'),
+            GinIndex(OpClass(Upper('title'), name='gin_trgm_ops'), name='subtask_title_upper_trgm_idx'),
+        ]
\ No newline at end of file
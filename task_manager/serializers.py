@@ -1,13 +1,17 @@
+from contextlib import contextmanager
 from datetime import timedelta
 from rest_framework import serializers
+from django.db import IntegrityError, transaction
 from django.utils import timezone
 from django.contrib.auth.models import User
 from django.contrib.auth.password_validation import validate_password as default_validate_password
 from .models import (
     Task,
     SubTask,
-    Category
+    Category,
+    STATUS_CHOICES
     )
+from .catalog import get_category_catalog
 
 # TODO: belongs to (serializers/)mixins.py
 class TrackFieldUpdatesMixin:
@@ -44,6 +48,21 @@ class TrackFieldUpdatesMixin:
         return instance
 
 
+class CatalogCategoryField(serializers.PrimaryKeyRelatedField):
+    """ Category id checked against the cached category catalog, not a query per id. """
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        category = get_category_catalog().by_id.get(pk)
+        if category is None:
+            self.fail('does_not_exist', pk_value=data)
+        return category
+
+
 class SubTaskSerializer(serializers.ModelSerializer):
     """ Sub Task model serializer. """
     class Meta:
@@ -107,26 +126,49 @@ class CategoryListSerializer(serializers.ModelSerializer):
 
 
 class CategoryCreateSerializer(serializers.ModelSerializer):
-    """ Category creation model serializer. """
+    """ Category creation and rename model serializer. """
     class Meta:
         model = Category
-        fields = ['name']
+        fields = ['id', 'name']
 
 
-    def validate_name(self, value):
-        qs = Category.objects.filter(name__iexact=value)
-        if self.instance:
-            qs = qs.exclude(pk=self.instance.pk)
-        
-        if qs.exists():
+    # uniqueness is enforced by the category_name_ci_unique index, no lookup before INSERT
+    def create(self, validated_data):
+        with self.unique_name_guard():
+            return super().create(validated_data)
+
+    def update(self, instance, validated_data):
+        with self.unique_name_guard():
+            return super().update(instance, validated_data)
+
+    @contextmanager
+    def unique_name_guard(self):
+        try:
+            with transaction.atomic():
+                yield
+        except IntegrityError as error:
+            if 'category_name_ci_unique' not in str(error):
+                raise
             raise serializers.ValidationError({"name": "Category name must be unique."})
-        return value
 
-    # def create(self, validated_data):
-    #     return super().create(validated_data)
 
-    # def update(self, instance, validated_data):
-    #     return super().update(instance, validated_data)
+class CategoryBulkSerializer(serializers.Serializer):
+    """ Category ids for bulk actions. """
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=1000
+    )
+
+
+class BulkStatusSerializer(serializers.Serializer):
+    """ Ids and target status for bulk status transitions. """
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=10_000
+    )
+    status = serializers.ChoiceField(choices=list(STATUS_CHOICES.items()))
 
 
 class TaskListSerializer(serializers.ModelSerializer):
@@ -158,6 +200,8 @@ class TaskDetailSerializer(TaskListSerializer):
 
 class TaskCreateSerializer(serializers.ModelSerializer):
     """ Task creation model serializer. """
+    category = CatalogCategoryField(many=True, allow_empty=False, queryset=Category.objects.all())
+
     class Meta:
         model = Task
         fields = [
@@ -180,6 +224,8 @@ class TaskCreateSerializer(serializers.ModelSerializer):
 
 class TaskUpdateSerializer(TrackFieldUpdatesMixin, serializers.ModelSerializer):
     """ Task update model serializer. """
+    category = CatalogCategoryField(many=True, allow_empty=False, queryset=Category.objects.all())
+
     class Meta:
         model = Task
         fields = [
@@ -195,6 +241,17 @@ class TaskUpdateSerializer(TrackFieldUpdatesMixin, serializers.ModelSerializer):
         read_only_fields = ['created_at', 'owner', 'updated_at']
 
 
+class TaskCalendarSerializer(serializers.ModelSerializer):
+    """ Compact task serializer for calendar buckets. """
+    class Meta:
+        model = Task
+        fields = ['id', 'title', 'status', 'deadline']
+
+
+class TaskBoardSerializer(TaskCalendarSerializer):
+    """ Compact task serializer for board columns. """
+
+
 class TaskStatisticsSerializer(serializers.Serializer):
     """ Task statistics serializer. """
     total_tasks = serializers.IntegerField()
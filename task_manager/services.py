@@ -0,0 +1,40 @@
+from django.db import connections, transaction
+from django.dispatch import Signal
+from django.utils import timezone
+
+# sender=model class, kwargs: rows [(id, owner_id, title), ...], status, using
+post_bulk_transition = Signal()
+
+
+def bulk_transition(queryset, status):
+    """ Set status of every task/subtask in queryset with one UPDATE ... RETURNING.
+
+    Only rows whose status actually changes are touched, updated_at is set like
+    auto_now would. post_bulk_transition is sent once with all changed rows, so
+    receivers can batch notifications instead of reacting per save().
+    Returns the list of (id, owner_id, title) of changed rows.
+    """
+    model = queryset.model
+    using = queryset.db
+    connection = connections[using]
+    opts = model._meta
+    status_field = opts.get_field('status')
+    quote = connection.ops.quote_name
+
+    ids_sql, ids_params = queryset.order_by().values('pk').query.get_compiler(using).as_sql()
+    status_value = status_field.get_db_prep_save(status, connection)
+    updated_at = opts.get_field('updated_at').get_db_prep_save(timezone.now(), connection)
+    sql = (
+        f'UPDATE {quote(opts.db_table)} '
+        f'SET {quote(status_field.column)} = %s, {quote("updated_at")} = %s '
+        f'WHERE {quote(opts.pk.column)} IN ({ids_sql}) AND {quote(status_field.column)} <> %s '
+        f'RETURNING {quote(opts.pk.column)}, {quote("owner_id")}, {quote("title")}'
+    )
+
+    with transaction.atomic(using=using):
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [status_value, updated_at, *ids_params, status_value])
+            rows = cursor.fetchall()
+        if rows:
+            post_bulk_transition.send(sender=model, rows=rows, status=status, using=using)
+    return rows
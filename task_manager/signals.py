@@ -1,6 +1,12 @@
-from django.db.models.signals import post_save
-from .models import Task
-from django.core.mail import send_mail
+from collections import defaultdict
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.contrib.auth import get_user_model
+from .models import Task, Category, STATUS_CHOICES
+from .catalog import bump_catalog_version, bump_statistic_version
+from .services import post_bulk_transition
+from first_project.soft_delete import post_soft_delete, post_restore
+from django.core.mail import send_mail, send_mass_mail
 
 def task_saved(sender, instance, update_fields, created, **kwargs):
     email_recipient = [instance.owner.email]
@@ -26,3 +32,56 @@ def task_saved(sender, instance, update_fields, created, **kwargs):
         )
 
 post_save.connect(task_saved, sender=Task)
+
+
+def category_changed(sender, **kwargs):
+    """ Save, soft delete, restore and hard delete (single or bulk) invalidate the category catalog. """
+    transaction.on_commit(bump_catalog_version, using=kwargs.get('using'))
+    transaction.on_commit(bump_statistic_version, using=kwargs.get('using'))
+
+post_save.connect(category_changed, sender=Category)
+post_delete.connect(category_changed, sender=Category)
+post_soft_delete.connect(category_changed, sender=Category)
+post_restore.connect(category_changed, sender=Category)
+
+
+def task_statistic_changed(sender, **kwargs):
+    """ Task changes and task category changes invalidate category statistics. """
+    if kwargs.get('action', 'post_').startswith('post_'):
+        transaction.on_commit(bump_statistic_version, using=kwargs.get('using'))
+
+post_save.connect(task_statistic_changed, sender=Task)
+post_delete.connect(task_statistic_changed, sender=Task)
+m2m_changed.connect(task_statistic_changed, sender=Task.category.through)
+
+
+def tasks_bulk_transitioned(sender, rows, status, using, **kwargs):
+    """ One status mail per owner for a bulk transition, instead of one per task. """
+    titles_by_owner = defaultdict(list)
+    for _, owner_id, title in rows:
+        if owner_id is not None:
+            titles_by_owner[owner_id].append(title)
+    emails = dict(
+        get_user_model().objects.using(using).filter(
+            id__in=titles_by_owner
+        ).values_list('id', 'email')
+    )
+
+    messages = []
+    for owner_id, titles in titles_by_owner.items():
+        email_recipient = [emails[owner_id]] if emails.get(owner_id) else []
+        task_list = '\n'.join(f'- {title}' for title in titles)
+        if status == 'DONE':
+            mail_title = 'Tasks closed'
+            mail_message = f'Good job! {len(titles)} task(s) have been closed:\n{task_list}'
+            email_recipient.extend(['crabmail@somecrab.de'])
+        else:
+            mail_title = 'Task status updated'
+            mail_message = f'Status of {len(titles)} task(s) has been updated to: {STATUS_CHOICES[status]}.\n{task_list}'
+        if email_recipient:
+            messages.append((mail_title, mail_message, 'crabmail@somecrab.de', email_recipient))
+
+    transaction.on_commit(lambda: send_mass_mail(messages), using=using)
+    transaction.on_commit(bump_statistic_version, using=using)
+
+post_bulk_transition.connect(tasks_bulk_transitioned, sender=Task)
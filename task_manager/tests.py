@@ -1,3 +1,162 @@
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from first_project.paginations import encode_keyset_cursor
+from .filters import TaskFilter
+from .models import Category, Task
+from .views import TaskBoardView
 
-# Create your tests here.
+
+class CategoryUniqueNameTest(TestCase):
+    """ Names are unique case-insensitively among active categories (category_name_ci_unique). """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'password')
+        cls.work = Category.objects.create(name='Work')
+        cls.home = Category.objects.create(name='Home')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_create_duplicate_name(self):
+        response = self.client.post(reverse('category-list'), {'name': 'WORK'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('name', response.data)
+
+    def test_rename_to_existing_name(self):
+        url = reverse('category-detail', args=[self.home.id])
+        for method in (self.client.put, self.client.patch):
+            response = method(url, {'name': 'work'})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('name', response.data)
+        self.home.refresh_from_db()
+        self.assertEqual(self.home.name, 'Home')
+
+    def test_rename(self):
+        response = self.client.patch(reverse('category-detail', args=[self.home.id]), {'name': 'House'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'id': self.home.id, 'name': 'House'})
+
+    def test_name_of_deleted_category_can_be_reused(self):
+        self.work.delete()
+        response = self.client.patch(reverse('category-detail', args=[self.home.id]), {'name': 'Work'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class TaskIndexUsageTest(TestCase):
+    """ EXPLAIN of the hot task queries uses the indexes made for them (migration 0011).
+
+    The test tables are tiny, so sequential scans are disabled for the test
+    transaction to make the planner show which index can serve a query.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user('owner', 'owner@example.com', 'password')
+
+    def setUp(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan, plan)
+
+    def test_owner_tasks(self):
+        self.assertUsesIndex(
+            Task.objects.filter(owner=self.user).order_by('created_at'), 'task_owner_created_at_idx'
+        )
+
+    def test_status(self):
+        self.assertUsesIndex(Task.objects.filter(status='PENDING'), 'task_status_created_at_idx')
+
+    def test_overdue(self):
+        # task_statistics failed_deadline_count
+        self.assertUsesIndex(
+            Task.objects.filter(deadline__lt=timezone.now()).exclude(status='DONE'), 'task_open_deadline_idx'
+        )
+
+    def test_weekday_filter(self):
+        # the filter expression is pinned to settings.TIME_ZONE, not the active timezone
+        with timezone.override('Asia/Tokyo'):
+            queryset = TaskFilter({'deadline_wd': 3}, queryset=Task.objects.all()).qs
+            self.assertUsesIndex(queryset, 'task_deadline_weekday_idx')
+
+
+class TaskBoardTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'password')
+        cls.done = Task.objects.bulk_create([Task(title=f'Done {number}', status='DONE') for number in range(5)])
+        cls.new = Task.objects.bulk_create([Task(title=f'New {number}', status='NEW') for number in range(2)])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def board(self, **params):
+        # tasks and counts of all columns come in one query
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('tasks-board'), {'columns': 'NEW,DONE', **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return {column['status']: column for column in response.data['columns']}
+
+    def task_ids(self, column):
+        return [task['id'] for task in column['tasks']]
+
+    def test_columns_are_paged_separately(self):
+        board = self.board(limit=2)
+        # bulk_create gives every task the same created_at, id breaks the tie
+        self.assertEqual(self.task_ids(board['DONE']), [self.done[4].id, self.done[3].id])
+        self.assertEqual(self.task_ids(board['NEW']), [self.new[1].id, self.new[0].id])
+        self.assertIsNone(board['NEW']['next_cursor'])
+
+        board = self.board(limit=2, cursor_done=board['DONE']['next_cursor'])
+        self.assertEqual(self.task_ids(board['DONE']), [self.done[2].id, self.done[1].id])
+        self.assertEqual(self.task_ids(board['NEW']), [self.new[1].id, self.new[0].id])
+
+    def test_count_of_empty_page(self):
+        last = encode_keyset_cursor(self.done[0].created_at, self.done[0].id)
+        board = self.board(cursor_done=last)
+        self.assertEqual(board['DONE']['tasks'], [])
+        self.assertEqual((board['DONE']['count'], board['DONE']['count_capped']), (5, False))
+        self.assertEqual(board['NEW']['count'], 2)
+
+    def test_count_is_capped(self):
+        with mock.patch.object(TaskBoardView, 'count_cap', 3):
+            board = self.board()
+        self.assertEqual((board['DONE']['count'], board['DONE']['count_capped']), (3, True))
+        self.assertEqual((board['NEW']['count'], board['NEW']['count_capped']), (2, False))
+
+    def test_invalid_cursor(self):
+        created_at = self.done[0].created_at
+        for cursor in (
+            'x',
+            encode_keyset_cursor(created_at, {'id': 1}),
+            encode_keyset_cursor(created_at, '1'),
+            encode_keyset_cursor(created_at, True),
+            encode_keyset_cursor('2025-13-01T00:00:00', 1),
+            encode_keyset_cursor(1, 1),
+        ):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(reverse('tasks-board'), {'cursor_done': cursor})
+                self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class TaskCalendarTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'password')
+
+    def test_invalid_dates(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        for date_from, date_to in (('2025-13-01', '2025-12-31'), ('2025-02-30', '2025-03-01'), ('', '2025-03-01')):
+            with self.subTest(date_from=date_from, date_to=date_to):
+                response = client.get(reverse('tasks-calendar'), {'from': date_from, 'to': date_to})
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -5,6 +5,10 @@ from .views import (
     TaskUserListView,
     TaskDetailUpdateDeleteView,
     task_statistics,
+    TaskCalendarView,
+    TaskBoardView,
+    TaskBulkStatusView,
+    SubTaskBulkStatusView,
     SubTaskListCreateView,
     SubTaskDetailUpdateDeleteView,
     CategoryViewSet,
@@ -44,7 +48,11 @@ urlpatterns = [
     path('user-tasks/', csrf_exempt(TaskUserListView.as_view()), name='user-tasks-list'),
     path('tasks/<int:pk>/', TaskDetailUpdateDeleteView.as_view(), name='task-detail-update-delete'),
     path('tasks/statistics/', task_statistics, name='statistics'),
+    path('tasks/calendar/', TaskCalendarView.as_view(), name='tasks-calendar'),
+    path('tasks/board/', TaskBoardView.as_view(), name='tasks-board'),
+    path('tasks/bulk-status/', TaskBulkStatusView.as_view(), name='tasks-bulk-status'),
     path('subtasks/', SubTaskListCreateView.as_view(), name='subtasks-list-create'),
+    path('subtasks/bulk-status/', SubTaskBulkStatusView.as_view(), name='subtasks-bulk-status'),
     path('subtasks/<int:pk>/', SubTaskDetailUpdateDeleteView.as_view(), name='subtasks-detail-update-delete'),
     path('', include(router.urls)),
     path('login/', csrf_exempt(LoginView.as_view()), name='manager-login'),
@@ -1,11 +1,16 @@
+from datetime import datetime, time, timedelta
 from django.shortcuts import render
-from django.db.models import Count, Q
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, transaction
+from django.db.models import Count, F, Q, Window
+from django.db.models.functions import RowNumber, TruncDate
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 from rest_framework.decorators import api_view, action
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.generics import (
+    GenericAPIView,
     ListAPIView,
     ListCreateAPIView,
     RetrieveUpdateDestroyAPIView
@@ -21,7 +26,10 @@ from rest_framework_simplejwt.authentication import JWTAuthentication
 from django.conf import settings
 import secrets
 from django_filters.rest_framework import DjangoFilterBackend
+from first_project.paginations import encode_keyset_cursor, decode_datetime_cursor
 from .filters import TaskFilter
+from .catalog import get_category_catalog, get_category_statistic
+from .services import bulk_transition
 from .models import (
     Task,
     SubTask,
@@ -35,12 +43,16 @@ from .serializers import (
     TaskCreateSerializer,
     TaskUpdateSerializer,
     TaskStatisticsSerializer,
+    TaskCalendarSerializer,
+    TaskBoardSerializer,
     SubTaskSerializer,
     SubTaskDetailsSerializer,
     SubTaskCreateSerializer,
     SubTaskUpdateSerializer,
     CategoryCreateSerializer,
     CategoryListSerializer,
+    CategoryBulkSerializer,
+    BulkStatusSerializer,
     UserRegisterSerializer,
     )
 from task_manager.permissions import IsOwnerOrReadOnly
@@ -206,31 +218,198 @@ class TaskDetailUpdateDeleteView(RetrieveUpdateDestroyAPIView):
 def task_statistics(request):
     """ Task statistics view """
     now = timezone.now()
-    stats_kwargs = {
-        'total_tasks': Count('id'),
-        'failed_deadline_count': Count(
-            'id',
-            filter=Q(deadline__lt=now) & ~Q(status='DONE')
-        ),
+    # GROUP BY status is served by task_status_created_at_idx,
+    # overdue count by the partial task_open_deadline_idx
+    count_by_status = dict.fromkeys(STATUS_CHOICES, 0)
+    count_by_status.update(
+        Task.objects.order_by().values_list('status').annotate(count=Count('id'))
+    )
+
+    statistics = {
+        'total_tasks': sum(count_by_status.values()),
+        'failed_deadline_count': Task.objects.filter(
+            deadline__lt=now
+        ).exclude(status='DONE').count(),
+        'count_by_status': count_by_status,
     }
+    serializer = TaskStatisticsSerializer(data=statistics)
+    serializer.is_valid(raise_exception=True)
+    return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class TaskCalendarView(GenericAPIView):
+    """ Tasks bucketed by deadline day: per-day count and first tasks of each day. """
+    queryset = Task.objects.all()
+    serializer_class = TaskCalendarSerializer
+    pagination_class = None
+    max_range_days = 62
+    default_per_day = 3
+    max_per_day = 20
+
+    def get(self, request):
+        try:
+            date_from = parse_date(request.query_params.get('from') or '')
+            date_to = parse_date(request.query_params.get('to') or '')
+        except ValueError:
+            # well formatted but impossible, e.g. month 13
+            date_from = date_to = None
+        if not date_from or not date_to:
+            return Response(
+                {'error': '"from" and "to" dates (YYYY-MM-DD) are required.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if date_from > date_to or (date_to - date_from).days >= self.max_range_days:
+            return Response(
+                {'error': f'Date range must be ordered and at most {self.max_range_days} days.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            per_day = int(request.query_params.get('per_day', self.default_per_day))
+        except ValueError:
+            per_day = self.default_per_day
+        per_day = min(max(per_day, 1), self.max_per_day)
+
+        start = timezone.make_aware(datetime.combine(date_from, time.min))
+        end = timezone.make_aware(datetime.combine(date_to + timedelta(days=1), time.min))
+        day = TruncDate('deadline')
+        # one range scan on task_deadline_idx, top-N per day via ROW_NUMBER()
+        tasks = self.get_queryset().filter(
+            deadline__gte=start,
+            deadline__lt=end
+        ).annotate(
+            day=day,
+            day_rank=Window(RowNumber(), partition_by=[day], order_by=[F('deadline').asc(), F('id').asc()]),
+            day_count=Window(Count('id'), partition_by=[day]),
+        ).filter(day_rank__lte=per_day).order_by('deadline', 'id')
+
+        days = {}
+        for task in tasks:
+            bucket = days.setdefault(task.day, {'date': task.day, 'count': task.day_count, 'tasks': []})
+            bucket['tasks'].append(self.get_serializer(task).data)
+
+        return Response({
+            'from': date_from,
+            'to': date_to,
+            'days': list(days.values()),
+        }, status=status.HTTP_200_OK)
+
+
+class TaskBoardView(GenericAPIView):
+    """ Kanban board: first tasks of every status column, each with its own keyset cursor.
+
+    Query params:
+        limit: tasks per column
+        columns: comma separated status codes, all columns by default
+        cursor_<status>: next_cursor of a column to load more of it
+
+    count of a column is capped at count_cap, count_capped tells there are more.
+    """
+    queryset = Task.objects.all()
+    serializer_class = TaskBoardSerializer
+    pagination_class = None
+    default_limit = 10
+    max_limit = 50
+    # column totals stop counting here, DONE grows without bound
+    count_cap = 1000
+
+    def get_column_queryset(self, status_code, cursor):
+        column = self.get_queryset().filter(status=status_code)
+        if cursor:
+            created_at, pk = decode_datetime_cursor(cursor)
+            column = column.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+        return column.order_by('-created_at', '-id')
+
+    def get_board(self, columns, cursors, limit):
+        """ Tasks of all columns and their capped counts in one query.
+
+        Every column is a branch of a UNION ALL: its count (a LIMIT-ed
+        index-only scan) LEFT JOINed to its page (a LIMIT-ed range scan on
+        task_status_created_at_idx), so an empty page still gives one row with
+        the count and NULL task fields. board_column orders the branches.
+        """
+        queryset = self.get_queryset().order_by()
+        parts, params = [], []
+        for index, code in enumerate(columns):
+            capped = queryset.filter(status=code).values('status')[:self.count_cap + 1]
+            page = self.get_column_queryset(code, cursors.get(code)).values(
+                'id', 'title', 'status', 'deadline', 'created_at'
+            )[:limit + 1]
+            capped_sql, capped_params = capped.query.sql_with_params()
+            page_sql, page_params = page.query.sql_with_params()
+            parts.append(
+                f'(SELECT %s AS board_column, total.column_count, page.* '
+                f'FROM (SELECT COUNT(*) AS column_count FROM ({capped_sql}) AS capped) AS total '
+                f'LEFT JOIN ({page_sql}) AS page ON TRUE)'
+            )
+            params += [index, *capped_params, *page_params]
+        sql = ' UNION ALL '.join(parts) + ' ORDER BY board_column, created_at DESC, id DESC'
+        return Task.objects.db_manager(queryset.db).raw(sql, params)
+
+    def get(self, request):
+        try:
+            limit = int(request.query_params.get('limit', self.default_limit))
+        except ValueError:
+            limit = self.default_limit
+        limit = min(max(limit, 1), self.max_limit)
+
+        requested = request.query_params.get('columns', '').split(',')
+        columns = [code for code in STATUS_CHOICES if code in requested] or list(STATUS_CHOICES)
+        cursors = {code: request.query_params.get(f'cursor_{code.lower()}') for code in columns}
+
+        board = {
+            code: {
+                'status': code,
+                'label': STATUS_CHOICES[code],
+                'count': 0,
+                'count_capped': False,
+                'tasks': [],
+                'next_cursor': None,
+            }
+            for code in columns
+        }
+        rows = {code: [] for code in columns}
+        for row in self.get_board(columns, cursors, limit):
+            code = columns[row.board_column]
+            board[code]['count'] = min(row.column_count, self.count_cap)
+            board[code]['count_capped'] = row.column_count > self.count_cap
+            if row.id is not None:
+                rows[code].append(row)
+
+        for code, tasks in rows.items():
+            column = board[code]
+            if len(tasks) > limit:
+                tasks = tasks[:limit]
+                column['next_cursor'] = encode_keyset_cursor(tasks[-1].created_at, tasks[-1].id)
+            column['tasks'] = self.get_serializer(tasks, many=True).data
+
+        return Response({'columns': list(board.values())}, status=status.HTTP_200_OK)
+
+
+class BulkStatusView(GenericAPIView):
+    """ Change status of many own tasks with one UPDATE, notifications are batched per owner. """
+    queryset = Task.objects.all()
+    serializer_class = BulkStatusSerializer
 
-    for status_key in STATUS_CHOICES:
-        stats_kwargs[f"{status_key.lower()}_count"] = Count(
-            'id',
-            filter=Q(status=status_key)
+    def get_queryset(self):
+        return super().get_queryset().filter(owner=self.request.user)
+
+    def patch(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        rows = bulk_transition(
+            self.get_queryset().filter(id__in=serializer.validated_data['ids']),
+            serializer.validated_data['status']
         )
+        return Response({'updated': [row[0] for row in rows]}, status=status.HTTP_200_OK)
 
-    statistics = Task.objects.aggregate(**stats_kwargs)
 
-    count_by_status = {
-        status_key: statistics.pop(f"{status_key.lower()}_count")
-        for status_key in STATUS_CHOICES
-    }
+class TaskBulkStatusView(BulkStatusView):
+    """ Bulk status change of tasks. """
 
-    statistics['count_by_status'] = count_by_status
-    serializer = TaskStatisticsSerializer(data=statistics)
-    serializer.is_valid(raise_exception=True)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+
+class SubTaskBulkStatusView(BulkStatusView):
+    """ Bulk status change of subtasks. """
+    queryset = SubTask.objects.all()
 
 
 class SubTaskListCreateView(ListCreateAPIView):
@@ -273,15 +452,29 @@ class CategoryViewSet(ModelViewSet):
     def get_queryset(self):
         if self.action in ['restore', 'hard_delete']:
             return Category.objects.only_deleted()
-        elif self.action == 'statistic':
+        elif self.action == 'statistic' and self.include_deleted:
             return Category.objects.include_deleted()
         return Category.objects.all()
 
+    @property
+    def include_deleted(self):
+        return self.request.query_params.get('include_deleted', '').lower() in ('1', 'true', 'yes')
+
     def get_serializer_class(self):
-        if self.request.method == 'POST':
+        if self.action in ['bulk_restore', 'bulk_hard_delete']:
+            return CategoryBulkSerializer
+        if self.action in ['create', 'update', 'partial_update']:
+            # name uniqueness is only checked by the functional index, see unique_name_guard
             return CategoryCreateSerializer
         return CategoryListSerializer
 
+    def list(self, request, *args, **kwargs):
+        """ Active categories from the cached catalog, with ETag. """
+        catalog = get_category_catalog()
+        if request.headers.get('If-None-Match') == catalog.etag:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': catalog.etag})
+        return Response(catalog.data, headers={'ETag': catalog.etag})
+
     def destroy(self, request, *args, **kwargs):
         """ Soft delete. """
         instance = self.get_object()
@@ -297,9 +490,14 @@ class CategoryViewSet(ModelViewSet):
                 {"error": "Category is not deleted."},
                 status=status.HTTP_400_BAD_REQUEST
                 )
-        category.is_deleted = False
-        category.deleted_at = None
-        category.save()
+        try:
+            with transaction.atomic():
+                category.restore()
+        except IntegrityError:
+            return Response(
+                {"error": "Active category with this name already exists."},
+                status=status.HTTP_400_BAD_REQUEST
+                )
         return Response(status=status.HTTP_200_OK)
 
     @action(detail=True, methods=['DELETE'])
@@ -319,17 +517,56 @@ class CategoryViewSet(ModelViewSet):
             status=status.HTTP_204_NO_CONTENT
             )
 
+    @action(detail=False, methods=['POST'], url_path='bulk-restore')
+    def bulk_restore(self, request):
+        """ Restore many soft-deleted categories with one UPDATE. """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            with transaction.atomic():
+                restored = Category.objects.only_deleted().filter(
+                    id__in=serializer.validated_data['ids']
+                ).restore()
+        except IntegrityError:
+            return Response(
+                {"error": "Active category with this name already exists."},
+                status=status.HTTP_400_BAD_REQUEST
+                )
+        return Response({"restored": restored}, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['DELETE'], url_path='bulk-hard-delete')
+    def bulk_hard_delete(self, request):
+        """ Permanently delete many soft-deleted categories in short batches. """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        deleted = Category.objects.hard_delete_batch(serializer.validated_data['ids'])
+        return Response({"deleted": deleted}, status=status.HTTP_200_OK)
+
     @action(detail=False, methods=['GET'])
     def statistic(self, request):
-        """ Statistics for categories. """
-        categories_with_tasks_count = Category.objects.annotate(tasks_count=Count('tasks'))
-
-        data = [
-            {
-                "id": category.id,
-                "category": category.name,
-                "tasks_count": category.tasks_count
-            }
-            for category in categories_with_tasks_count
-        ]
-        return Response(data)
\ No newline at end of file
+        """ Statistics for categories: tasks count per category and status.
+
+        Soft-deleted categories are included with ?include_deleted=true.
+        """
+        return Response(get_category_statistic(self.include_deleted, self.compute_statistic))
+
+    def compute_statistic(self):
+        # single GROUP BY over category -> through table -> task, on the primary
+        # because the result is cached under the current statistic version
+        rows = self.get_queryset().using(DEFAULT_DB_ALIAS).order_by('id').values(
+            'id', 'name', 'is_deleted', 'tasks__status'
+        ).annotate(count=Count('tasks'))
+
+        data = {}
+        for row in rows:
+            category = data.setdefault(row['id'], {
+                "id": row['id'],
+                "category": row['name'],
+                "is_deleted": row['is_deleted'],
+                "tasks_count": 0,
+                "count_by_status": dict.fromkeys(STATUS_CHOICES, 0),
+            })
+            if row['tasks__status'] is not None:
+                category['count_by_status'][row['tasks__status']] = row['count']
+                category['tasks_count'] += row['count']
+        return list(data.values())
\ No newline at end of file